@@ -15,8 +15,14 @@ $db_player = array(
 $top7_db = array(
 	"server"	=> "db",
 	"database"	=> "topseven");
+# replica for the reads (SELECT), empty server : every query goes to the primary
+$top7_db_replica = array(
+	"server"	=> "db-replica",
+	"database"	=> "topseven");
 
 define("c_prod", "");
+define("c_db_persistent", false); # persistent MySQL connections (checked once per request)
+define("c_db_replica_lag", 5); # read-your-writes : seconds during which a session which wrote reads from the primary
 #define("c_prod", "ovh");
 
 define("c_admin_login", "admin");
@@ -41,6 +47,10 @@ define( "c_url_lnr_req",    "http://www.lnr.fr/fdmi?nid=");
 define( "c_records_limit", 3);
 define( "c_records_remove_duplicate", true);
 define( "c_canceled_season", 5); # season 2019-2020
+define( "c_stats_max_players", 8); # stats_api : max players compared
+define( "c_sql_slow_ms", 200); # slow-query log ($log_path/slow_sql_*.log) : threshold in ms, 0 to disable
+define( "c_sql_footer", false); # SQL summary at the bottom of the pages (also ?sql_profile=1 when $debug)
+define( "c_sql_timing", false); # Server-Timing header of the SQL time, in debug mode or to admin sessions (the pages are buffered)
 
 define( "c_min_password", 	6);
 define( "c_max_password", 	30);
@@ -0,0 +1,12 @@
+-- Replica of the db service (GTID based), started at the first start of the container
+-- The data loaded in db (init_db.sh) is replicated
+
+CHANGE REPLICATION SOURCE TO
+    SOURCE_HOST='db',
+    SOURCE_PORT=3306,
+    SOURCE_USER='root',
+    SOURCE_PASSWORD='root',
+    SOURCE_AUTO_POSITION=1,
+    GET_SOURCE_PUBLIC_KEY=1;
+
+START REPLICA;
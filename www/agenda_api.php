@@ -14,6 +14,9 @@ $player_id = $_SESSION['player']; // player, not player_idx in session
 $team = $_SESSION['top7team']; // top7team, not team in session
 $season = $_SESSION['season'];
 
+// reads: 304 if the agenda of the team did not change (writes are POST)
+\Top7\Display\PageRenderer::conditional(["team_$team"], [$team, $player_id, date('Y-m'), $_GET]);
+
 try {
     switch ($action) {
         case 'list_events':
@@ -68,6 +71,11 @@ try {
             http_response_code(400);
             echo json_encode(['error' => 'Action invalide']);
     }
+
+    // the cached reads of the team agenda are no longer valid
+    if ($_SERVER['REQUEST_METHOD'] === 'POST') {
+        bump_team_version($team);
+    }
 } catch (Exception $e) {
     http_response_code(500);
     echo json_encode(['error' => $e->getMessage()]);
@@ -77,7 +85,7 @@ try {
  * Liste les événements d'une équipe pour un mois donné
  */
 function list_events($team, $month) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::get();
 
     $start_date = $month . '-01';
     $end_date = date('Y-m-t', strtotime($start_date));
@@ -118,7 +126,8 @@ function list_events($team, $month) {
  * Récupère les détails d'un événement avec les disponibilités
  */
 function get_event_details($event_id, $team) {
-    global $pdo, $player_id;
+    global $player_id;
+    $pdo = \Top7\Database\Connection::get();
 
     // Vérifier que l'événement appartient à l'équipe
     $sql = "SELECT e.*,
@@ -174,7 +183,7 @@ function get_event_details($event_id, $team) {
  * Crée un nouvel événement
  */
 function create_event($data, $player_id, $team) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::get();
 
     // Validation
     if (empty($data['title'])) {
@@ -225,7 +234,7 @@ function create_event($data, $player_id, $team) {
  * Met à jour un événement
  */
 function update_event($event_id, $data, $player_id, $team) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::get();
 
     // Vérifier que le joueur est le créateur
     $stmt = $pdo->prepare("SELECT created_by FROM event WHERE id = :id AND team = :team");
@@ -287,7 +296,7 @@ function update_event($event_id, $data, $player_id, $team) {
  * Supprime un événement
  */
 function delete_event($event_id, $player_id, $team) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::get();
 
     // Vérifier que le joueur est le créateur
     $stmt = $pdo->prepare("SELECT created_by FROM event WHERE id = :id AND team = :team");
@@ -313,7 +322,7 @@ function delete_event($event_id, $player_id, $team) {
  * Définit ou met à jour la disponibilité d'un joueur
  */
 function set_availability($event_id, $player_id, $status, $comment = '') {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::get();
 
     // Vérifier que l'événement existe
     $stmt = $pdo->prepare("SELECT id FROM event WHERE id = :id");
@@ -351,7 +360,7 @@ function set_availability($event_id, $player_id, $status, $comment = '') {
  * Récupère les statistiques de disponibilité pour un événement
  */
 function get_availability_stats($event_id) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::get();
 
     $sql = "SELECT
                 COUNT(CASE WHEN status = 'available' THEN 1 END) as available,
@@ -372,7 +381,7 @@ function get_availability_stats($event_id) {
  * Vérifie si un événement doit être confirmé automatiquement
  */
 function check_auto_confirm($event_id) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::get();
 
     $sql = "SELECT e.min_players, e.status,
                    COUNT(CASE WHEN ea.status = 'available' THEN 1 END) as available_count
@@ -1,6 +1,7 @@
 <?php
 
 	include("common.inc");
+	load_module("forum", "rank");
 	check_session();
 
 	init_sql();
@@ -0,0 +1,16 @@
+<?php
+
+	include("common.inc");
+	check_session();
+
+	print_header();
+	init_sql();
+
+	echo "<center>\n";
+	display_update_match_day( $_GET);
+	echo "</center>\n";
+
+?>
+
+</body>
+</html>
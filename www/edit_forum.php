@@ -2,6 +2,7 @@
 
 
 	include("common.inc");
+	load_module("forum");
 	check_session();
 
 	init_admin_sql();
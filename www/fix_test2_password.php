@@ -10,7 +10,7 @@ echo "Fixing test2 user password\n";
 echo "==========================\n\n";
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 $passwordService = new \Top7\Auth\PasswordService();
 
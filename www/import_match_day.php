@@ -0,0 +1,69 @@
+<?php
+// $php -f import_match_day.php <season> <day> <results.csv>
+//
+// Enter all the results of a match day at once (one transaction, one standings update).
+// results.csv : team1,team2,score1,score2,try1,try2[,date,time]
+// date and time are kept from the calendar when they are not given or empty.
+// A pair team1,team2 which is not in the calendar of the day stops the import (nothing written).
+//
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+include("common.inc");
+load_module("update");
+
+if ($argc < 4) {
+    echo "Usage: php import_match_day.php <season> <day> <results.csv>\n";
+    exit(1);
+}
+
+$season = intval($argv[1]);
+$day    = intval($argv[2]);
+$file   = $argv[3];
+
+if (!file_exists($file)) {
+    echo "Error: file not found: $file\n";
+    exit(1);
+}
+
+init_admin_sql();
+
+$calendar = array();
+foreach (get_matchs_by_date($day, $season) as $match) {
+    $calendar[$match['team1'] . "-" . $match['team2']] = $match;
+}
+
+$matchs = array();
+$fields = array("team1", "team2", "score1", "score2", "try1", "try2", "date", "time");
+foreach (file($file, FILE_IGNORE_NEW_LINES | FILE_SKIP_EMPTY_LINES) as $line) {
+    $values = str_getcsv($line);
+    if (!is_numeric($values[0])) {
+        continue; // header
+    }
+
+    $match = array();
+    foreach ($fields as $i => $field) {
+        $match[$field] = trim($values[$i] ?? "");
+    }
+
+    foreach (array("team1", "team2", "score1", "score2", "try1", "try2") as $field) {
+        $match[$field] = intval($match[$field]);
+    }
+
+    $key = $match['team1'] . "-" . $match['team2'];
+    if (!isset($calendar[$key])) {
+        echo "Error: no match $key for day $day of season $season\n";
+        exit(1);
+    }
+    // empty field (",,") or missing column: from the calendar
+    $match['date'] = $match['date'] ?: $calendar[$key]['date'];
+    $match['time'] = $match['time'] ?: $calendar[$key]['time'];
+    $matchs[]      = $match;
+}
+
+print "season : $season - day : $day - matchs : " . count($matchs) . "\n";
+update_match_day(array("season" => $season, "day" => $day, "matchs" => $matchs));
+print "done\n";
+
+?>
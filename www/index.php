@@ -1,6 +1,5 @@
 <?php
 require_once 'common.inc';
-require_once 'src/Display/PageRenderer.php';
 
 use Top7\Auth\SessionManager;
 use Top7\Display\PageRenderer;
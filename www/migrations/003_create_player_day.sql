@@ -0,0 +1,22 @@
+-- Migration pour créer la table des classements par journée (historique)
+-- Une ligne par joueur et par journée : totaux cumulés et classement dans l'équipe Top7
+-- Remplie à la saisie des résultats, backfill : php backfill_player_day.php
+
+CREATE TABLE IF NOT EXISTS `player_day` (
+    `season` TINYINT(4) NOT NULL,
+    `day` TINYINT(4) NOT NULL,
+    `player` MEDIUMINT(9) NOT NULL,
+    `team` SMALLINT(6) NOT NULL COMMENT 'Équipe Top7',
+    `pt` SMALLINT(6) NOT NULL DEFAULT 0 COMMENT 'Points',
+    `g` TINYINT(4) NOT NULL DEFAULT 0 COMMENT 'Gagné',
+    `n` TINYINT(4) NOT NULL DEFAULT 0 COMMENT 'Nul',
+    `p` TINYINT(4) NOT NULL DEFAULT 0 COMMENT 'Perdu',
+    `ve` TINYINT(4) NOT NULL DEFAULT 0 COMMENT 'Victoires Extérieures',
+    `pm` INT(11) NOT NULL DEFAULT 0 COMMENT 'Points Marqués',
+    `pe` INT(11) NOT NULL DEFAULT 0 COMMENT 'Points Encaissés',
+    `pb` TINYINT(4) NOT NULL DEFAULT 0 COMMENT 'Points Bonus',
+    `ne` TINYINT(4) DEFAULT NULL COMMENT 'Equipes différentes',
+    `rank` TINYINT(4) NOT NULL COMMENT 'Classement dans l''équipe Top7',
+    PRIMARY KEY (`season`, `player`, `day`),
+    KEY `idx_season_day_team` (`season`, `day`, `team`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
@@ -0,0 +1,17 @@
+-- Migration pour ajouter le masque des équipes différentes sélectionnées
+-- Bit (team - 1) à 1 : l'équipe a été sélectionnée sur un match joué (team = 1..14)
+-- eq = BIT_COUNT(teams14), d14 est renseigné quand les 14 bits sont à 1
+
+ALTER TABLE `player`
+    ADD COLUMN `teams14` SMALLINT UNSIGNED NOT NULL DEFAULT 0 COMMENT 'Masque des équipes différentes' AFTER `eq`;
+
+-- Backfill depuis les pronos des matchs joués
+UPDATE `player`
+JOIN (
+    SELECT prono.player, BIT_OR(1 << (prono.team - 1)) AS mask
+    FROM `prono`
+    JOIN `score` ON score.team = prono.team AND score.day = prono.day AND score.season = prono.season
+    WHERE score.J = 1 AND prono.team > 0
+    GROUP BY prono.player
+) AS m ON m.player = player.player_idx
+SET player.teams14 = m.mask;
@@ -0,0 +1,23 @@
+-- Migration pour créer la table des réservations de match
+-- Règle : un seul match Top14 par équipe Top7 et par journée
+-- La clé primaire rend la vérification et la réservation atomiques (un seul INSERT)
+
+CREATE TABLE IF NOT EXISTS `prono_reservation` (
+    `season` TINYINT(4) NOT NULL,
+    `day` TINYINT(4) NOT NULL,
+    `top7team` SMALLINT(6) NOT NULL COMMENT 'Équipe Top7',
+    `match` INT(11) NOT NULL COMMENT 'match.id',
+    `player` SMALLINT(6) NOT NULL,
+    `created_at` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (`season`, `day`, `top7team`, `match`),
+    KEY `idx_season_day_player` (`season`, `day`, `player`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Backfill depuis les pronos de la phase régulière
+INSERT IGNORE INTO `prono_reservation` (`season`, `day`, `top7team`, `match`, `player`)
+SELECT prono.season, prono.day, player.team, match.id, prono.player
+FROM `prono`
+JOIN `player` ON player.player_idx = prono.player
+JOIN `match` ON match.season = prono.season AND match.day = prono.day
+    AND (match.team1 = prono.team OR match.team2 = prono.team)
+WHERE prono.team > 0 AND prono.day <= 26;
@@ -0,0 +1,37 @@
+-- Migration pour ajouter les index composites des requêtes principales
+-- Jointures prono/score/match sur (season, day, team), sélection des joueurs par équipe Top7,
+-- saison et email, forum par (season, day, team)
+-- Vérification : php audit_queries.php
+
+-- prono : jointures sur (season, day, team), pronos d'un joueur par saison et journée
+ALTER TABLE `prono`
+    ADD KEY `idx_season_day_team` (`season`, `day`, `team`),
+    ADD KEY `idx_player_season_day` (`player`, `season`, `day`),
+    DROP KEY `player`;
+
+-- score : une ligne par (season, day, team)
+ALTER TABLE `score`
+    ADD KEY `idx_season_day_team` (`season`, `day`, `team`),
+    ADD KEY `idx_season_team_day` (`season`, `team`, `day`);
+
+-- match : matchs d'une équipe par journée
+ALTER TABLE `match`
+    ADD KEY `idx_season_day_team1` (`season`, `day`, `team1`),
+    ADD KEY `idx_season_day_team2` (`season`, `day`, `team2`),
+    DROP KEY `season_day`;
+
+-- player : joueurs d'une équipe Top7, d'une saison, palmarès par email
+ALTER TABLE `player`
+    ADD KEY `idx_team` (`team`),
+    ADD KEY `idx_season_team` (`season`, `team`),
+    ADD KEY `idx_email_season` (`email`, `season`);
+
+-- team_player : équipes Top7 d'une saison
+ALTER TABLE `team_player`
+    ADD KEY `idx_season` (`season`);
+
+-- forum : InnoDB (verrous par ligne, transactions) et commentaires d'une équipe par journée
+ALTER TABLE `forum` ENGINE=InnoDB;
+
+ALTER TABLE `forum`
+    ADD KEY `idx_season_day_team_date` (`season`, `day`, `team`, `date`);
@@ -0,0 +1,81 @@
+-- Migration pour créer les tables de synthèse des records (toutes saisons)
+-- Une ligne par joueur et par saison (records_player), par équipe Top7 et par saison (records_team)
+-- Écrites à la clôture de la saison (update_records_rollup) : les records lisent les premières
+-- lignes d'un index trié au lieu d'agréger l'historique de player à chaque page
+
+CREATE TABLE IF NOT EXISTS `records_player` (
+    `season` TINYINT(4) NOT NULL,
+    `player` MEDIUMINT(9) NOT NULL COMMENT 'player.player_idx',
+    `pseudo` VARCHAR(40) NOT NULL,
+    `team` VARCHAR(50) NOT NULL COMMENT 'Équipe Top7',
+    `season_title` VARCHAR(40) NOT NULL,
+    `pts` SMALLINT(6) NOT NULL,
+    `fun` INT(11) NOT NULL COMMENT 'Points fun',
+    `J` TINYINT(4) NOT NULL,
+    `G` TINYINT(4) NOT NULL,
+    `N` TINYINT(4) NOT NULL,
+    `P` TINYINT(4) NOT NULL,
+    `diff` INT(11) NOT NULL COMMENT 'Points marqués - encaissés',
+    `bd` TINYINT(4) NOT NULL,
+    `bo` TINYINT(4) NOT NULL,
+    `bonus` SMALLINT(6) NOT NULL,
+    `pc` TINYINT(4) NOT NULL COMMENT 'Points coiffeur',
+    `eq` TINYINT(4) NOT NULL COMMENT 'Equipes différentes',
+    `ve` TINYINT(4) NOT NULL COMMENT 'Victoires Extérieures',
+    `d14` TINYINT(4) DEFAULT NULL COMMENT 'Journée pour 14 équipes différentes',
+    `d14_rank` TINYINT(4) AS (IFNULL(`d14`, 26)) STORED,
+    PRIMARY KEY (`season`, `player`),
+    KEY `idx_pts` (`pts` DESC, `G` DESC, `ve` DESC, `eq` DESC, `N` DESC, `diff` DESC),
+    KEY `idx_fun` (`fun` DESC, `pts` DESC, `G` DESC, `ve` DESC, `eq` DESC, `N` DESC, `diff` DESC),
+    KEY `idx_ve` (`ve` DESC, `G` DESC, `N` DESC, `pts` DESC),
+    KEY `idx_pc` (`pc` DESC, `bo` DESC, `bd` DESC, `pts` DESC),
+    KEY `idx_bo` (`bo` DESC, `bd` DESC, `pts` DESC),
+    KEY `idx_d14` (`d14_rank`, `eq` DESC, `pts` DESC)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS `records_team` (
+    `season` TINYINT(4) NOT NULL,
+    `team` SMALLINT(6) NOT NULL COMMENT 'team_player.team_idx',
+    `name` VARCHAR(50) NOT NULL,
+    `season_title` VARCHAR(40) NOT NULL,
+    `pts` INT(11) NOT NULL,
+    `fun` INT(11) NOT NULL,
+    `J` SMALLINT(6) NOT NULL COMMENT 'Journées jouées par les 7 joueurs',
+    `G` SMALLINT(6) NOT NULL,
+    `N` SMALLINT(6) NOT NULL,
+    `P` SMALLINT(6) NOT NULL,
+    `diff` INT(11) NOT NULL,
+    `bd` SMALLINT(6) NOT NULL,
+    `bo` SMALLINT(6) NOT NULL,
+    `bonus` SMALLINT(6) NOT NULL,
+    `pc` SMALLINT(6) NOT NULL,
+    `ve` SMALLINT(6) NOT NULL,
+    `n14` TINYINT(4) NOT NULL COMMENT 'Joueurs à 14 équipes différentes',
+    PRIMARY KEY (`season`, `team`),
+    KEY `idx_pts` (`pts` DESC, `G` DESC, `ve` DESC, `n14` DESC, `N` DESC, `diff` DESC)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Backfill des saisons closes (toutes sauf la dernière saison avec des joueurs)
+INSERT IGNORE INTO `records_player`
+    (`season`, `player`, `pseudo`, `team`, `season_title`, `pts`, `fun`, `J`, `G`, `N`, `P`,
+     `diff`, `bd`, `bo`, `bonus`, `pc`, `eq`, `ve`, `d14`)
+SELECT team_player.season, player.player_idx, player.pseudo, team_player.name, season.title,
+    player.point, player.fun, player.J, player.G, player.N, player.P,
+    player.pm - player.pe, player.bd, player.bo, player.bo + player.bd, player.pc, player.eq, player.ve, player.d14
+FROM `team_player`
+JOIN `player` ON team_player.team_idx = player.team
+JOIN `season` ON team_player.season = season.Id
+WHERE team_player.season < (SELECT MAX(p.season) FROM `player` p);
+
+INSERT IGNORE INTO `records_team`
+    (`season`, `team`, `name`, `season_title`, `pts`, `fun`, `J`, `G`, `N`, `P`,
+     `diff`, `bd`, `bo`, `bonus`, `pc`, `ve`, `n14`)
+SELECT team_player.season, team_player.team_idx, team_player.name, season.title,
+    SUM(player.point), SUM(player.fun), SUM(player.J), SUM(player.G), SUM(player.N), SUM(player.P),
+    SUM(player.pm) - SUM(player.pe), SUM(player.bd), SUM(player.bo), SUM(player.bo) + SUM(player.bd),
+    SUM(player.pc), SUM(player.ve), SUM(IF(player.eq = 14, 1, 0))
+FROM `team_player`
+JOIN `player` ON team_player.team_idx = player.team
+JOIN `season` ON team_player.season = season.Id
+WHERE team_player.season < (SELECT MAX(p.season) FROM `player` p)
+GROUP BY team_player.season, team_player.team_idx, team_player.name, season.title;
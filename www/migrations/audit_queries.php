@@ -0,0 +1,130 @@
+<?php
+/**
+ * Query Audit
+ *
+ * Runs the hot read functions (Top7 and Top14 standings, forum, palmares, records)
+ * on the data of a season, captures their statements and runs EXPLAIN on each one.
+ * Fails if a statement reads a whole table, except the small lookup tables.
+ *
+ * Run it on a generated dataset (generate_full_dataset.php) after the index migration (006).
+ *
+ * Usage:
+ *   php audit_queries.php [season]
+ *
+ * Exit code 0 if no full scan is found, 1 otherwise.
+ *
+ * @package Top7\Migrations
+ */
+
+require_once dirname(__DIR__) . '/common.inc';
+load_module("forum", "rank", "records", "update");
+
+use Top7\Database\QueryProfiler;
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+// small tables: a full scan reads a few rows (seasons, Top14 teams, Top7 teams)
+// records rollups: one row per player (team) and season, ranked in SQL (top N, best row per pseudo)
+$small_tables = ['season', 'team', 'team_player', 'records_player', 'records_team'];
+
+init_sql();
+$pdo = \Top7\Database\Connection::get();
+
+$season = intval($argv[1] ?? 0);
+if ($season == 0) {
+    $season = intval($pdo->query("SELECT MAX(season) FROM player")->fetchColumn());
+}
+$player = $pdo->query("SELECT player_idx, team, email FROM player WHERE season=$season AND team > 0 LIMIT 1")->fetch(PDO::FETCH_ASSOC);
+if (!$player) {
+    die("No player in season $season, generate a dataset first (generate_full_dataset.php)\n");
+}
+$day = max(1, intval(get_last_day($season)));
+
+echo "Season $season, day $day, Top7 team {$player['team']}\n\n";
+
+// records and palmares read the closed seasons: season + 1 includes the audited season
+$audits = [
+    'get_rank7' => function () use ($day, $player) {
+        get_rank7($day, $player['team']);
+    },
+    'get_prono_results' => function () use ($day, $season) {
+        get_prono_results($day, $season);
+    },
+    'display_rank' => function () use ($day, $season) {
+        get_rank14_nocache($day, $season);
+    },
+    'get_forum' => function () use ($day, $season, $player) {
+        get_forum(['day' => $day, 'season' => $season, 'top7team' => $player['team']]);
+    },
+    'get_palmares_player' => function () use ($player) {
+        get_palmares_player($player['email']);
+    },
+    'get_records_by_team' => function () use ($season) {
+        get_records_by_team($season + 1);
+    },
+    'get_records_by_player' => function () use ($season) {
+        get_records_by_player($season + 1);
+    },
+    'get_records_fun' => function () use ($season) {
+        get_records_fun($season + 1);
+    },
+    'get_records_exterieur' => function () use ($season) {
+        get_records_exterieur($season + 1);
+    },
+    'get_records_coiffeur' => function () use ($season) {
+        get_records_coiffeur($season + 1);
+    },
+    'get_records_BOff' => function () use ($season) {
+        get_records_BOff($season + 1);
+    },
+    'get_records_14' => function () use ($season) {
+        get_records_14($season + 1);
+    },
+];
+
+$failures = 0;
+foreach ($audits as $name => $audit) {
+    QueryProfiler::startCapture();
+    $audit();
+    $statements = QueryProfiler::stopCapture();
+
+    echo "$name: " . count($statements) . " statement(s)\n";
+    foreach ($statements as $statement) {
+        $plan = QueryProfiler::explain($statement['query'], $statement['params']);
+        if ($plan === null) {
+            echo "  ? {$statement['function']}: no plan\n";
+            continue;
+        }
+
+        foreach ($plan as $row) {
+            $table = $row['table'] ?? '';
+            $full  = in_array($row['type'], ['ALL', 'index'])
+                && !in_array($table, $small_tables)
+                && $table !== ''
+                && $table[0] !== '<'; // <derivedN>, <unionN,M> : temporary tables
+            printf(
+                "  %s %-28s %-14s %-8s %-28s %8s\n",
+                $full ? "FULL" : "  ok",
+                $statement['function'],
+                $table,
+                $row['type'] ?? '',
+                $row['key'] ?? '-',
+                $row['rows'] ?? ''
+            );
+            if ($full) {
+                $failures++;
+            }
+        }
+    }
+    echo "\n";
+}
+
+if ($failures) {
+    echo "FAILED: $failures full scan(s)\n";
+    exit(1);
+}
+
+echo "OK: no full scan\n";
+exit(0);
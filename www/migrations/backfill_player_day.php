@@ -0,0 +1,43 @@
+<?php
+/**
+ * Backfill Player Day Snapshots
+ *
+ * Fills the player_day table (migration 003) for past seasons:
+ * one snapshot per player and per played day of the regular phase.
+ *
+ * Usage:
+ *   php backfill_player_day.php          (all seasons)
+ *   php backfill_player_day.php <season>
+ *
+ * @package Top7\Migrations
+ */
+
+require_once dirname(__DIR__) . '/common.inc';
+load_module("update");
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+init_admin_sql();
+
+if (isset($argv[1])) {
+    $seasons = array(intval($argv[1]));
+} else {
+    $seasons = array();
+    foreach (pdo_fetch("backfill", c_all, "select distinct season from `score` where J=1 order by season") as $row) {
+        $seasons[] = intval($row['season']);
+    }
+}
+
+foreach ($seasons as $season) {
+    $row      = pdo_fetch("backfill", c_one, "select max(day) as day from `score` where J=1 and season=$season");
+    $last_day = min(intval($row['day']), c_last_day);
+
+    echo "Season $season: days 1 to $last_day\n";
+    for ($day = 1; $day <= $last_day; $day++) {
+        update_player_day($day, $season);
+    }
+}
+
+echo "\n✓ Backfill completed\n";
@@ -0,0 +1,64 @@
+<?php
+/**
+ * Benchmark Standings Update
+ *
+ * Runs the full regular phase standings recompute for every played day of a season
+ * and reports the number of round trips per day, with bulk writes (now) and with
+ * one UPDATE per player row (before).
+ * The "before" column is an estimate, not a measure: the round trips of this run
+ * plus the statements saved by the bulk writes (QueryExecutor::getSavedCount()).
+ * To measure the previous version, run this script on it.
+ * Everything runs in a transaction which is rolled back: the database is not modified.
+ *
+ * Usage:
+ *   php benchmark_standings.php [season]
+ *
+ * @package Top7\Migrations
+ */
+
+require_once dirname(__DIR__) . '/common.inc';
+load_module("update");
+
+use Top7\Database\QueryExecutor;
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+init_admin_sql();
+
+$season = intval($argv[1] ?? 0);
+if ($season == 0) {
+    $top7_season = get_top7_season();
+    $season      = intval($top7_season['Id']);
+}
+$last_day = get_last_day($season);
+
+echo "Season $season, days 1 to $last_day\n\n";
+printf("%5s %10s %10s %10s\n", "day", "est.before", "after", "time (ms)");
+
+$total_before = $total_after = 0;
+$total_hits   = $total_misses = 0;
+
+QueryExecutor::beginTransaction();
+for ($day = 1; $day <= $last_day; $day++) {
+    QueryExecutor::resetQueryCount();
+    $start = microtime(true);
+
+    update_standings_phase_reguliere($day, $season);
+
+    $time   = (microtime(true) - $start) * 1000;
+    $after  = QueryExecutor::getQueryCount();
+    $before = $after + QueryExecutor::getSavedCount(); // estimated, not measured
+    $total_before += $before;
+    $total_after  += $after;
+    $stats         = QueryExecutor::getCacheStats();
+    $total_hits   += $stats['hits'];
+    $total_misses += $stats['misses'];
+    printf("%5d %10d %10d %10.1f\n", $day, $before, $after, $time);
+}
+QueryExecutor::rollback();
+
+printf("\n%5s %10d %10d\n", "total", $total_before, $total_after);
+echo "\nest.before: estimated with one UPDATE per row saved by the bulk writes\n";
+printf("\nPrepared statements: %d reused, %d prepared\n", $total_hits, $total_misses);
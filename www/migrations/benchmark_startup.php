@@ -0,0 +1,116 @@
+<?php
+/**
+ * Benchmark Startup
+ *
+ * Measures the time to first byte of the entry points over HTTP: median and 90th percentile
+ * of the requests, after one warm-up request. Without a session cookie the pages answer
+ * with the redirection to the login page: the time is the startup of the page
+ * (common.inc, modules, classes, session). With the cookie of a logged-in player,
+ * the time includes the rendering.
+ *
+ * Before / after: run it with --save on the previous version, then with --compare
+ * on the current one. It does not use common.inc, so it can be copied to any version.
+ *
+ * Usage:
+ *   php benchmark_startup.php <base_url> [runs] [--cookie=PHPSESSID=...] [--save=file] [--compare=file]
+ *
+ * @package Top7\Migrations
+ */
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+$args    = [];
+$options = [];
+foreach (array_slice($argv, 1) as $arg) {
+    if (preg_match('/^--(\w+)=(.*)$/', $arg, $m)) {
+        $options[$m[1]] = $m[2];
+    } else {
+        $args[] = $arg;
+    }
+}
+
+if (count($args) < 1) {
+    die("Usage: php benchmark_startup.php <base_url> [runs] [--cookie=PHPSESSID=...] [--save=file] [--compare=file]\n");
+}
+
+$base = rtrim($args[0], '/');
+$runs = max(1, intval($args[1] ?? 20));
+
+// entry points: pages (standings, records, ...) and the small endpoints
+$entries = [
+    'index'      => 'index.php',
+    'logout'     => 'logout.php',
+    'display'    => 'display.php',
+    'rank'       => 'rank.php',
+    'rank7'      => 'rank7.php',
+    'calendar'   => 'calendar.php',
+    'records'    => 'records.php',
+    'stats'      => 'stats.php',
+    'player'     => 'player.php',
+    'agenda_api' => 'agenda_api.php?action=list_events',
+    'stats_api'  => 'stats_api.php?action=players_list',
+];
+
+/**
+ * Time to first byte of a request
+ *
+ * @return array [ttfb (ms), HTTP code]
+ */
+function request_ttfb($url, $cookie)
+{
+    $ch = curl_init($url);
+    curl_setopt($ch, CURLOPT_RETURNTRANSFER, true);
+    curl_setopt($ch, CURLOPT_FOLLOWLOCATION, false);
+    if ($cookie !== null) {
+        curl_setopt($ch, CURLOPT_COOKIE, $cookie);
+    }
+    curl_exec($ch);
+    $ttfb = curl_getinfo($ch, CURLINFO_STARTTRANSFER_TIME) * 1000;
+    $code = curl_getinfo($ch, CURLINFO_HTTP_CODE);
+    curl_close($ch);
+
+    return [$ttfb, $code];
+}
+
+function percentile($values, $p)
+{
+    sort($values);
+    return $values[min(count($values) - 1, intval(floor(count($values) * $p)))];
+}
+
+$cookie = $options['cookie'] ?? null;
+$before = isset($options['compare']) ? json_decode(file_get_contents($options['compare']), true) : null;
+
+echo "$base, $runs requests per entry point" . ($cookie !== null ? ", with session cookie" : "") . "\n\n";
+if ($before) {
+    printf("%-12s %5s %12s %12s %8s\n", "entry", "code", "before (ms)", "after (ms)", "delta");
+} else {
+    printf("%-12s %5s %12s %12s\n", "entry", "code", "median (ms)", "p90 (ms)");
+}
+
+$results = [];
+foreach ($entries as $name => $path) {
+    $url = "$base/$path";
+    request_ttfb($url, $cookie); // warm-up: OPcache, realpath cache, connection
+
+    $times = [];
+    for ($i = 0; $i < $runs; $i++) {
+        list($ttfb, $code) = request_ttfb($url, $cookie);
+        $times[] = $ttfb;
+    }
+    $results[$name] = ['code' => $code, 'median' => percentile($times, 0.5), 'p90' => percentile($times, 0.9)];
+
+    if ($before && isset($before[$name])) {
+        $delta = $before[$name]['median'] > 0 ? ($results[$name]['median'] / $before[$name]['median'] - 1) * 100 : 0;
+        printf("%-12s %5d %12.1f %12.1f %7.0f%%\n", $name, $code, $before[$name]['median'], $results[$name]['median'], $delta);
+    } else {
+        printf("%-12s %5d %12.1f %12.1f\n", $name, $code, $results[$name]['median'], $results[$name]['p90']);
+    }
+}
+
+if (isset($options['save'])) {
+    file_put_contents($options['save'], json_encode($results, JSON_PRETTY_PRINT));
+    echo "\nSaved to {$options['save']}\n";
+}
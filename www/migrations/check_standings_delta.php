@@ -0,0 +1,102 @@
+<?php
+/**
+ * Check Standings Delta
+ *
+ * Edits the result of a match of the regular phase with the delta update
+ * (update_standings_delta, the path of update_match), then recomputes the whole
+ * season (update_standings_phase_reguliere) up to the last played day, and
+ * compares the player rows of the two (totals, teams14, d14, fun, rank, evo).
+ * Everything runs in one transaction which is rolled back: the database is not modified.
+ *
+ * Edit a past day to check that the season totals (pc, eq, teams14) are not cut
+ * at the edited day, and that rank and evo are the current ones.
+ *
+ * Usage:
+ *   php check_standings_delta.php <season> <day> <team1> <team2> <score1> <score2> <try1> <try2>
+ *
+ * @package Top7\Migrations
+ */
+
+require_once dirname(__DIR__) . '/common.inc';
+load_module("update");
+
+use Top7\Database\QueryExecutor;
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+if (count($argv) < 9) {
+    die("Usage: php check_standings_delta.php <season> <day> <team1> <team2> <score1> <score2> <try1> <try2>\n");
+}
+
+init_admin_sql();
+
+list($season, $day, $team1, $team2, $score1, $score2, $try1, $try2) = array_map('intval', array_slice($argv, 1, 8));
+
+if ($day > c_last_day) {
+    die("Day $day is not in the regular phase (1 to " . c_last_day . ").\n");
+}
+
+$match = pdo_fetch("check", c_one, "select `date`, `time` from `match` where season=$season and day=$day and team1=$team1 and team2=$team2");
+if (!$match) {
+    die("No match $team1 - $team2 on day $day of season $season.\n");
+}
+
+/**
+ * Standings columns of the players of the season, by player
+ */
+function get_standings_snapshot($season)
+{
+    global $score_player_columns;
+
+    $columns = array_merge(array_values($score_player_columns), array("eq", "teams14", "d14", "fun", "rank", "evo"));
+    $query   = "select player_idx, pseudo, `" . implode("`, `", $columns) . "` from `player` where season=$season";
+    $rows    = array();
+    foreach (pdo_fetch("check", c_all, $query) as $row) {
+        $rows[$row['player_idx']] = $row;
+    }
+
+    return $rows;
+}
+
+QueryExecutor::beginTransaction();
+try {
+    // delta: same steps as update_match(), without the commit
+    $befores = get_scores($day, $season, array($team1, $team2));
+    write_match_score(array(
+        "day" => $day, "season" => $season, "team1" => $team1, "team2" => $team2,
+        "score1" => $score1, "score2" => $score2, "try1" => $try1, "try2" => $try2,
+        "date" => $match['date'], "time" => $match['time'],
+    ));
+    update_match_cascade($day, $season, $befores);
+    $delta = get_standings_snapshot($season);
+
+    // full recompute up to the last played day
+    $row      = pdo_fetch("check", c_one, "select max(day) as day from `score` where J=1 and season=$season");
+    $last_day = min(intval($row['day']), c_last_day);
+    update_standings_phase_reguliere($last_day, $season);
+    $full = get_standings_snapshot($season);
+} finally {
+    QueryExecutor::rollback();
+}
+
+echo "Season $season, day $day: $team1 - $team2 $score1-$score2 ($try1-$try2), full recompute up to day $last_day\n\n";
+
+$differences = 0;
+foreach ($full as $player => $row) {
+    foreach ($row as $column => $value) {
+        if ($column === 'pseudo' || ($delta[$player][$column] ?? null) == $value) {
+            continue;
+        }
+        printf("%-20s %-8s delta %8s  full %8s\n", $row['pseudo'], $column, $delta[$player][$column] ?? '-', $value);
+        $differences++;
+    }
+}
+
+if ($differences) {
+    echo "\n✗ $differences differences (rolled back)\n";
+    exit(1);
+}
+
+echo "✓ Delta and full recompute agree (rolled back)\n";
@@ -0,0 +1,31 @@
+<?php
+/**
+ * Database Connection Metrics
+ *
+ * Prints the connection counters of the web requests since the last reset:
+ * requests, requests which opened a connection, requests which never touched
+ * the database (lazy connection), reconnections after a lost connection.
+ * With APCu, the web server moves its counts to the files by batches
+ * (Cache::COUNTER_FLUSH): the last counts of each counter may not be shown yet.
+ *
+ * Usage:
+ *   php db_metrics.php
+ *
+ * @package Top7\Migrations
+ */
+
+require_once dirname(__DIR__) . '/common.inc';
+
+use Top7\Database\Connection;
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+$metrics = Connection::getMetrics();
+$unused  = $metrics['requests'] ? 100 * $metrics['unused'] / $metrics['requests'] : 0;
+
+printf("%-12s %10d\n", "requests", $metrics['requests']);
+printf("%-12s %10d\n", "opened", $metrics['opened']);
+printf("%-12s %10d (%.1f%%)\n", "unused", $metrics['unused'], $unused);
+printf("%-12s %10d\n", "reconnects", $metrics['reconnects']);
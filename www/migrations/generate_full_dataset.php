@@ -25,7 +25,7 @@ echo "  Generating Full Top 14 Dataset\n";
 echo "==============================================\n\n";
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 try {
     $pdo->beginTransaction();
@@ -266,6 +266,7 @@ try {
     echo "✓ Generated $pronoCount player predictions\n\n";
 
     $pdo->commit();
+    bump_timeline_version(); // new seasons and match dates
 
     echo "\n==============================================\n";
     echo "  ✓ Dataset Generation Complete!\n";
@@ -19,7 +19,7 @@ echo "  Top 14 2025-2026 Real Dataset Generator\n";
 echo "==============================================\n\n";
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 // Team name mapping (real names to database IDs)
 $teamMap = [
@@ -320,6 +320,7 @@ try {
     echo "✓ Generated $pronoCount predictions\n\n";
 
     $pdo->commit();
+    bump_timeline_version(); // new season and match dates
 
     echo "\n==============================================\n";
     echo "  ✓ Real Dataset Complete!\n";
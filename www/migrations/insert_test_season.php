@@ -19,7 +19,7 @@ if (php_sapi_name() !== 'cli') {
 echo "Creating test season...\n\n";
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 try {
     // Check if season already exists
@@ -151,6 +151,7 @@ try {
     }
 
     echo "✓ Created " . ($matchId - 1) . " matches (5 days)\n";
+    bump_timeline_version(); // new season, calendar and match dates
     echo "\n✓ Season setup complete!\n";
 
 } catch (PDOException $e) {
@@ -19,7 +19,7 @@ if (php_sapi_name() !== 'cli') {
 echo "Creating 7 test users...\n\n";
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 // Initialize PasswordService
 $passwordService = new \Top7\Auth\PasswordService();
@@ -19,7 +19,7 @@ if (php_sapi_name() !== 'cli') {
 echo "Populating test scores for Top 14...\n\n";
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 try {
     $pdo->beginTransaction();
@@ -25,12 +25,13 @@ if (!$migration_number) {
     exit(1);
 }
 
-$migration_file = __DIR__ . "/{$migration_number}_add_password_new_column.sql";
+$migration_files = glob(__DIR__ . "/{$migration_number}_*.sql");
 
-if (!file_exists($migration_file)) {
-    echo "Error: Migration file not found: {$migration_file}\n";
+if (count($migration_files) !== 1) {
+    echo "Error: Migration file not found: " . __DIR__ . "/{$migration_number}_*.sql\n";
     exit(1);
 }
+$migration_file = $migration_files[0];
 
 echo "Running migration: {$migration_file}\n";
 
@@ -46,7 +47,7 @@ $statements = array_filter(
 );
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 try {
     // Note: DDL statements (CREATE, ALTER, DROP) cause implicit commits in MySQL
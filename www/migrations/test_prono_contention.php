@@ -0,0 +1,93 @@
+<?php
+/**
+ * Prono Reservation Contention Test
+ *
+ * Fires concurrent reservations of the same Top14 team by the players of one Top7 team
+ * (one process and one connection per player, all started at the same instant)
+ * and checks that exactly one of them gets the match.
+ * The reservations made by the test are removed at the end.
+ *
+ * Usage:
+ *   php test_prono_contention.php <season> <day> <team> [top7team]
+ *
+ * Exit code 0 if the rule holds, 1 otherwise.
+ *
+ * @package Top7\Migrations
+ */
+
+require_once dirname(__DIR__) . '/common.inc';
+load_module("update");
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+// child process: wait for the start instant, then claim
+if (($argv[1] ?? '') === '--claim') {
+    list(, , $season, $day, $team, $player, $start) = $argv;
+    init_admin_sql();
+    time_sleep_until(floatval($start));
+    echo reserve_prono(intval($season), intval($day), intval($team), intval($player)) ? "1" : "0";
+    exit(0);
+}
+
+if ($argc < 4) {
+    die("Usage: php test_prono_contention.php <season> <day> <team> [top7team]\n");
+}
+
+$season   = intval($argv[1]);
+$day      = intval($argv[2]);
+$team     = intval($argv[3]);
+$top7team = intval($argv[4] ?? 0);
+
+init_admin_sql();
+$pdo = \Top7\Database\Connection::get();
+
+$where = $top7team ? "team=$top7team" : "team=(select min(team) from player where season=$season and team > 0)";
+$players = $pdo->query("SELECT player_idx, team FROM player WHERE season=$season AND $where")->fetchAll(PDO::FETCH_ASSOC);
+if (count($players) < 2) {
+    die("Not enough players in the Top7 team\n");
+}
+$top7team = $players[0]['team'];
+
+$stmt = $pdo->prepare("SELECT COUNT(*) FROM prono_reservation WHERE season=? AND day=? AND top7team=?");
+$stmt->execute([$season, $day, $top7team]);
+if ($stmt->fetchColumn() > 0) {
+    die("Top7 team $top7team already has reservations for day $day, choose another day\n");
+}
+
+echo "Season $season, day $day, team $team: " . count($players) . " concurrent claims for Top7 team $top7team\n";
+
+$start = microtime(true) + 1;
+$procs   = [];
+$outputs = [];
+foreach ($players as $player) {
+    $cmd = [PHP_BINARY, __FILE__, '--claim', $season, $day, $team, $player['player_idx'], sprintf('%.6f', $start)];
+    $procs[$player['player_idx']] = proc_open($cmd, [1 => ['pipe', 'w']], $pipes);
+    $outputs[$player['player_idx']] = $pipes[1];
+}
+
+$claimed = [];
+foreach ($procs as $player => $proc) {
+    if (trim(stream_get_contents($outputs[$player])) === "1") {
+        $claimed[] = $player;
+    }
+    fclose($outputs[$player]);
+    proc_close($proc);
+}
+
+$stmt->execute([$season, $day, $top7team]);
+$rows = $stmt->fetchColumn();
+
+$pdo->prepare("DELETE FROM prono_reservation WHERE season=? AND day=? AND top7team=?")->execute([$season, $day, $top7team]);
+
+echo "Claimed by: " . (count($claimed) ? implode(", ", $claimed) : "nobody") . "\n";
+echo "Reservations stored: $rows\n";
+
+if (count($claimed) === 1 && $rows == 1) {
+    echo "OK\n";
+    exit(0);
+}
+
+echo "FAILED: expected exactly one reservation\n";
+exit(1);
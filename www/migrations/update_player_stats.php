@@ -19,7 +19,7 @@ if (php_sapi_name() !== 'cli') {
 echo "Updating player statistics...\n\n";
 
 init_sql();
-global $pdo;
+$pdo = \Top7\Database\Connection::get();
 
 try {
     $seasonId = 1;
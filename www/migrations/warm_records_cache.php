@@ -0,0 +1,70 @@
+<?php
+/**
+ * Records Cache Pre-warm
+ *
+ * Computes the records and the palmares of the closed seasons into the shared cache,
+ * so that the first visitor of the records page after a season close does not pay the queries.
+ * Run it after closing a season (or after editing the results of a closed season).
+ *
+ * Usage:
+ *   php warm_records_cache.php [season] [--clear]
+ *
+ *   season   current season (default: the season in progress)
+ *   --clear  invalidate the cached records first
+ *
+ * @package Top7\Migrations
+ */
+
+require_once dirname(__DIR__) . '/common.inc';
+load_module("records");
+
+use Top7\Utils\Cache;
+
+if (php_sapi_name() !== 'cli') {
+    die("This script must be run from the command line.\n");
+}
+
+$args   = array_slice($argv, 1);
+$clear  = in_array('--clear', $args);
+$args   = array_values(array_diff($args, ['--clear']));
+$season = intval($args[0] ?? 0);
+
+init_sql();
+
+if ($season == 0) {
+    $top7_season = get_top7_season();
+    if (!$top7_season) {
+        die("No season in progress\n");
+    }
+    $season = intval($top7_season['Id']);
+}
+
+if ($clear) {
+    bump_records_version();
+}
+
+echo "Season $season, records version " . Cache::version("records") . "\n";
+
+// the pages compute the cache entries: warm through them, output discarded
+$pages = [
+    'records by team' => ['display_stats' => c_stats_by_team],
+    'records by player' => ['display_stats' => c_stats_by_player],
+    'records fun' => ['display_stats' => c_stats_fun],
+    'records exterieur' => ['display_stats' => c_stats_exterieur],
+    'records coiffeur' => ['display_stats' => c_stats_coiffeur],
+    'records BOff' => ['display_stats' => c_stats_BOff],
+    'records 14' => ['display_stats' => c_stats_14],
+    'palmares' => null,
+];
+
+foreach ($pages as $name => $display) {
+    $start = microtime(true);
+    ob_start();
+    if ($display === null) {
+        palmares(['season' => $season]);
+    } else {
+        records(['season' => $season] + $display);
+    }
+    ob_end_clean();
+    printf("%-20s %8.1f ms\n", $name, (microtime(true) - $start) * 1000);
+}
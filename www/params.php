@@ -2,6 +2,7 @@
 
 
 	include("common.inc");
+	load_module("update");
 	check_session();
 
 
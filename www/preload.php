@@ -0,0 +1,40 @@
+<?php
+/**
+ * OPcache Preload
+ *
+ * Compiles the hot set once, when the server starts: the classes of src/, common.inc
+ * and the modules of the most visited pages (standings, forum, prono writes).
+ * Their functions and classes are then defined in every request without being loaded;
+ * include("common.inc") and load_module() only run the remaining top-level code.
+ * The other modules (records, register, email) are loaded on first use.
+ *
+ * php.ini:
+ *   opcache.preload=/var/www/html/preload.php
+ *   opcache.preload_user=www-data
+ *
+ * Preloaded files are not reloaded when they change: restart the server after a deployment.
+ *
+ * @package Top7
+ */
+
+// preload only (opcache.preload), not a page
+if (isset($_SERVER['REQUEST_METHOD']) || !function_exists('opcache_compile_file')) {
+    http_response_code(404);
+    exit;
+}
+
+$preload = array_merge(
+    glob(__DIR__ . '/src/*/*.php'),
+    [
+        __DIR__ . '/common.inc',
+        __DIR__ . '/inc/rank.inc',
+        __DIR__ . '/inc/forum.inc',
+        __DIR__ . '/inc/update.inc',
+    ]
+);
+
+foreach ($preload as $file) {
+    if (is_file($file)) {
+        opcache_compile_file($file);
+    }
+}
@@ -2,6 +2,7 @@
 
 
 	include("common.inc");
+	load_module("rank", "forum");
 	check_session();
 	init_sql();
 
@@ -32,6 +33,7 @@
 
 	$_SESSION['day'] 	= $day;
 
+	check_not_modified( $_SESSION);
 
 	init_deadline();
 	echo "<center>\n";
@@ -1,6 +1,7 @@
 <?php
 
 	include("common.inc");
+	load_module("records");
 	check_session();
 
 	print_header();
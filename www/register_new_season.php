@@ -1,6 +1,7 @@
 <?php
 
 	include("common.inc");
+	load_module("register");
 	check_session();
 	print_header_register();
 	init_sql();
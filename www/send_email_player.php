@@ -6,6 +6,7 @@
 //
 echo "<pre>send_email_player</pre>";
 include("common.inc");
+load_module("email");
 init_sql();
 session_start();
 init_time_session();
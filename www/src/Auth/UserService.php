@@ -12,18 +12,24 @@
 namespace Top7\Auth;
 
 use Top7\Database\QueryExecutor;
+use Top7\Utils\RequestCache;
 
 class UserService {
 
     /**
      * Get player information by player ID
      *
+     * The row is kept for the rest of the request (RequestCache map "player").
+     *
      * @param int $playerId Player ID
      * @return array|null Player data or null if not found
      */
     public static function getPlayer(int $playerId): ?array {
-        $query = "SELECT * FROM player WHERE player_idx = ?";
-        return QueryExecutor::fetch(__METHOD__, QueryExecutor::MODE_ONE, $query, [$playerId]);
+        $method = __METHOD__;
+        return RequestCache::remember('player', $playerId, function () use ($playerId, $method) {
+            $query = "SELECT * FROM player WHERE player_idx = ?";
+            return QueryExecutor::fetch($method, QueryExecutor::MODE_ONE, $query, [$playerId]);
+        });
     }
 
     /**
@@ -33,8 +39,7 @@ class UserService {
      * @return array|null Player data or null if not found
      */
     public static function getPlayerInfo(int $playerId): ?array {
-        $query = "SELECT * FROM player WHERE player_idx = ?";
-        return QueryExecutor::fetch(__METHOD__, QueryExecutor::MODE_ONE, $query, [$playerId]);
+        return self::getPlayer($playerId);
     }
 
     /**
@@ -135,6 +140,7 @@ class UserService {
     public static function updatePlayerEmail(string $email, int $playerId): void {
         $query = "UPDATE player SET email = ? WHERE player_idx = ?";
         QueryExecutor::execute(__METHOD__, $query, [$email, $playerId]);
+        RequestCache::forget('player', $playerId);
     }
 
     /**
@@ -5,6 +5,15 @@
  * Provides database connection singleton for the application.
  * Extracted from common.inc as part of code modernization.
  *
+ * The connection is lazy: initPlayer()/initAdmin() only record the credentials,
+ * the PDO handle is opened by the first get() (first QueryExecutor call).
+ * With c_db_persistent, the handle is a persistent connection, checked once per
+ * request; a connection lost during the request ("server has gone away") is reopened.
+ *
+ * Reads can be sent to a replica ($top7_db_replica): getRead() returns the replica
+ * connection, unless the request or the session wrote recently (read-your-writes,
+ * c_db_replica_lag seconds) or a transaction is open on the primary.
+ *
  * @package Top7\Database
  * @since Phase 1, Task 1.2.1
  */
@@ -13,15 +22,57 @@ namespace Top7\Database;
 
 use PDO;
 use PDOException;
+use Top7\Utils\Cache;
 use Top7\Utils\Logger;
 
 class Connection {
 
+    /**
+     * MySQL client errors of a lost connection
+     */
+    const GONE_AWAY = 2006;  // MySQL server has gone away
+    const LOST = 2013;       // Lost connection to MySQL server during query
+
     /**
      * @var PDO|null Singleton PDO instance
      */
     private static $pdo = null;
 
+    /**
+     * @var PDO|null Replica connection (reads)
+     */
+    private static $replica = null;
+
+    /**
+     * @var bool True if the replica could not be opened during this request
+     */
+    private static $replicaDown = false;
+
+    /**
+     * @var bool True once the primary was written during this request
+     */
+    private static $wrote = false;
+
+    /**
+     * @var array|null Credentials of the connection to open
+     */
+    private static $login = null;
+
+    /**
+     * @var bool True once the metrics of the request are registered
+     */
+    private static $metricsRegistered = false;
+
+    /**
+     * @var bool True if the connection was opened during this request
+     */
+    private static $opened = false;
+
+    /**
+     * @var int Number of reconnections during this request
+     */
+    private static $reconnects = 0;
+
     /**
      * @var string Date format string
      */
@@ -29,45 +80,131 @@ class Connection {
 
     /**
      * Initialize database connection with player credentials
-     *
-     * @return PDO Database connection
      */
-    public static function initPlayer(): PDO {
+    public static function initPlayer(): void {
         global $db_player;
-        return self::connect($db_player);
+        self::connect($db_player);
     }
 
     /**
      * Initialize database connection with admin credentials
-     *
-     * @return PDO Database connection
      */
-    public static function initAdmin(): PDO {
+    public static function initAdmin(): void {
         global $db_admin;
-        return self::connect($db_admin);
+        self::connect($db_admin);
     }
 
     /**
-     * Connect to database with given credentials
+     * Set the credentials of the connection, opened on first use
+     *
+     * An open connection with other credentials is closed.
      *
      * @param array $login Login credentials array with 'user' and 'password' keys
+     */
+    public static function connect(array $login): void {
+        if ((self::$pdo !== null || self::$replica !== null) && self::$login !== $login) {
+            self::close();
+        }
+        self::$login = $login;
+
+        // metrics of the web requests only
+        if (!self::$metricsRegistered && php_sapi_name() !== 'cli') {
+            self::$metricsRegistered = true;
+            register_shutdown_function([self::class, 'recordMetrics']);
+        }
+    }
+
+    /**
+     * Get the connection, opening it on first use
+     *
      * @return PDO Database connection
+     * @throws \RuntimeException if no credentials were set
+     */
+    public static function get(): PDO {
+        if (self::$pdo === null) {
+            if (self::$login === null) {
+                throw new \RuntimeException('Database not initialized. Call initPlayer() or initAdmin() first.');
+            }
+            self::open();
+        }
+
+        return self::$pdo;
+    }
+
+    /**
+     * Get the connection for a read, opening it on first use
+     *
+     * @return PDO Replica connection, or primary connection (no replica, read-your-writes, transaction)
      */
-    public static function connect(array $login): PDO {
-        global $top7_db;
+    public static function getRead(): PDO {
+        if (!self::useReplica()) {
+            return self::get();
+        }
+
+        if (self::$replica === null) {
+            self::open(false, true);
+        }
+
+        return self::$replica ?? self::get();
+    }
+
+    /**
+     * Check if the reads can go to the replica
+     *
+     * @return bool True if a replica is configured and no recent write must be read back
+     */
+    private static function useReplica(): bool {
+        global $top7_db_replica;
+
+        if (empty($top7_db_replica['server']) || self::$replicaDown || self::$wrote) {
+            return false;
+        }
+        if (self::$pdo !== null && self::$pdo->inTransaction()) {
+            return false;
+        }
+
+        // read-your-writes: the session wrote less than c_db_replica_lag seconds ago
+        $lag = defined('c_db_replica_lag') ? c_db_replica_lag : 0;
+        if (isset($_SESSION['db_write_time']) && time() - $_SESSION['db_write_time'] < $lag) {
+            return false;
+        }
+
+        return true;
+    }
+
+    /**
+     * Record a write on the primary: the following reads of the request and of the session go to the primary
+     */
+    public static function markWrite(): void {
+        self::$wrote = true;
+        if (session_status() === PHP_SESSION_ACTIVE) {
+            $_SESSION['db_write_time'] = time();
+        }
+    }
+
+    /**
+     * Open the connection with the recorded credentials
+     *
+     * @param bool $fresh True to open a new connection even with c_db_persistent
+     * @param bool $replica True to open the replica connection
+     */
+    private static function open(bool $fresh = false, bool $replica = false): void {
+        global $top7_db, $top7_db_replica;
 
         // Set locale for date formatting
         setlocale(LC_TIME, 'fr_FR', 'fra');
         self::$strDate = mb_convert_encoding('%a %d %b %Y %H:%M', 'ISO-8859-9', 'UTF-8');
 
-        $server   = $top7_db['server'];
-        $database = $top7_db['database'];
-        $user     = $login['user'];
-        $password = $login['password'];
-        $charset  = "utf8mb4";
+        $db         = $replica ? $top7_db_replica : $top7_db;
+        $server     = $db['server'];
+        $database   = $db['database'];
+        $user       = self::$login['user'];
+        $password   = self::$login['password'];
+        $charset    = "utf8mb4";
+        $persistent = !$fresh && defined('c_db_persistent') && c_db_persistent;
 
         try {
-            self::$pdo = new PDO(
+            $pdo = new PDO(
                 "mysql:dbname=$database;host=$server;charset=$charset",
                 $user,
                 $password,
@@ -75,43 +212,150 @@ class Connection {
                     PDO::ATTR_ERRMODE => PDO::ERRMODE_EXCEPTION,
                     PDO::ATTR_DEFAULT_FETCH_MODE => PDO::FETCH_ASSOC,
                     PDO::ATTR_EMULATE_PREPARES => false,
+                    PDO::ATTR_PERSISTENT => $persistent,
                 ]
             );
-
-            return self::$pdo;
+            self::$opened = true;
         } catch (PDOException $e) {
-            Logger::log("error", "sql", "db init");
+            if ($replica) {
+                // the replica is optional: the reads go to the primary
+                Logger::log("error", "sql", "replica init " . $e->getMessage(), Logger::WARNING);
+                self::$replicaDown = true;
+                return;
+            }
+            self::$pdo = null;
+            Logger::log("error", "sql", "db init", Logger::ERROR);
             Logger::error(__FUNCTION__, "(db init)" . $e->getMessage());
         }
+
+        if ($replica) {
+            self::$replica = $pdo;
+        } else {
+            self::$pdo = $pdo;
+        }
+
+        // a persistent connection may have been closed by the server since the last request
+        if ($persistent && !self::isAlive($pdo)) {
+            self::reconnect($replica);
+        }
     }
 
     /**
-     * Get current PDO instance
+     * Check that the server still answers on a connection
      *
-     * @return PDO|null Current database connection or null if not initialized
+     * @param PDO $pdo Database connection
+     * @return bool True if alive
+     */
+    private static function isAlive(PDO $pdo): bool {
+        try {
+            $pdo->query('SELECT 1');
+            return true;
+        } catch (PDOException $e) {
+            return false;
+        }
+    }
+
+    /**
+     * Check if an error is a lost connection
+     *
+     * @param PDOException $e Error
+     * @return bool True for "server has gone away" / "lost connection"
+     */
+    public static function isGoneAway(PDOException $e): bool {
+        $code = $e->errorInfo[1] ?? 0;
+        return $code == self::GONE_AWAY || $code == self::LOST;
+    }
+
+    /**
+     * Drop the current connection and open a new one
+     *
+     * @param bool $replica True for the replica connection
+     */
+    public static function reconnect(bool $replica = false): void {
+        QueryExecutor::clearStatementCache();
+        if ($replica) {
+            self::$replica = null;
+        } else {
+            self::$pdo = null;
+        }
+        self::$reconnects++;
+        Logger::log("error", "sql", "reconnect", Logger::WARNING);
+
+        // not persistent: a broken persistent handle could be given back
+        self::open(true, $replica);
+    }
+
+    /**
+     * Check if a connection is the replica connection
+     *
+     * @param PDO $pdo Database connection
+     * @return bool True for the replica
+     */
+    public static function isReplica(PDO $pdo): bool {
+        return self::$replica !== null && $pdo === self::$replica;
+    }
+
+    /**
+     * Get current PDO instance, without opening it
+     *
+     * @return PDO|null Current database connection or null if not opened
      */
     public static function getInstance(): ?PDO {
         return self::$pdo;
     }
 
     /**
-     * Get PDO instance or throw exception if not initialized
+     * Get PDO instance, opening it if needed
      *
      * @return PDO Database connection
      * @throws \RuntimeException if connection not initialized
      */
     public static function getInstanceOrFail(): PDO {
-        if (self::$pdo === null) {
-            throw new \RuntimeException('Database not initialized. Call initPlayer() or initAdmin() first.');
-        }
-        return self::$pdo;
+        return self::get();
     }
 
     /**
      * Close the database connection
      */
     public static function close(): void {
+        // the cached statements keep a reference on the connection
+        QueryExecutor::clearStatementCache();
         self::$pdo = null;
+        self::$replica = null;
+    }
+
+    /**
+     * Count the request in the connection metrics (end of request)
+     *
+     * requests: web requests which set credentials, opened: requests which opened
+     * the connection, reconnects: connections reopened after a loss.
+     * The counts go to APCu when available (see Cache::increment): no file lock per request.
+     */
+    public static function recordMetrics(): void {
+        Cache::increment('db_requests');
+        if (self::$opened) {
+            Cache::increment('db_opened');
+        }
+        if (self::$reconnects > 0) {
+            Cache::increment('db_reconnects', self::$reconnects);
+        }
+    }
+
+    /**
+     * Get the connection metrics
+     *
+     * @return array requests, opened, unused (requests which never touched the database), reconnects
+     */
+    public static function getMetrics(): array {
+        $requests = Cache::counter('db_requests');
+        $opened = Cache::counter('db_opened');
+
+        return [
+            'requests' => $requests,
+            'opened' => $opened,
+            'unused' => $requests - $opened,
+            'reconnects' => Cache::counter('db_reconnects'),
+        ];
     }
 
     /**
@@ -24,6 +24,41 @@ class QueryExecutor {
     const MODE_ONE = 1;   // Fetch single row
     const MODE_ALL = 2;   // Fetch all rows
 
+    /**
+     * Maximum number of rows written by one bulk statement
+     */
+    const BULK_CHUNK = 500;
+
+    /**
+     * Maximum number of prepared statements kept per connection
+     */
+    const STATEMENT_CACHE_SIZE = 64;
+
+    /**
+     * @var array Prepared statements by connection id, then by SQL text, least recently used first
+     */
+    private static $statements = [];
+
+    /**
+     * @var int Number of statements found in the cache
+     */
+    private static $cacheHits = 0;
+
+    /**
+     * @var int Number of statements prepared on the server
+     */
+    private static $cacheMisses = 0;
+
+    /**
+     * @var int Number of statements sent to the server (round trips)
+     */
+    private static $queryCount = 0;
+
+    /**
+     * @var int Number of single-row statements replaced by bulk statements
+     */
+    private static $savedCount = 0;
+
     /**
      * Execute a SELECT query with parameters
      *
@@ -34,7 +69,7 @@ class QueryExecutor {
      * @return array|null Query results
      */
     public static function fetch(string $function, int $mode, string $query, ?array $params = null) {
-        global $pdo, $debug_mysql;
+        global $debug_mysql;
 
         if ($debug_mysql) {
             echo "<pre>$query</pre>";
@@ -43,19 +78,34 @@ class QueryExecutor {
         Logger::log($function, "sql", $query);
         $result = null;
 
+        self::$queryCount++;
+        $start = microtime(true);
+
         try {
-            $stmt = $pdo->prepare($query);
-            $stmt->setFetchMode(PDO::FETCH_ASSOC);
-            $stmt->execute($params);
-
-            if ($mode === self::MODE_ONE) {
-                $result = $stmt->fetch();
-            } elseif ($mode === self::MODE_ALL) {
-                $result = $stmt->fetchAll();
-            }
+            $result = self::run(true, function (PDO $pdo) use ($mode, $query, $params) {
+                $result = null;
+                $stmt = self::prepare($pdo, $query);
+                $stmt->setFetchMode(PDO::FETCH_ASSOC);
+                $stmt->execute($params);
+
+                if ($mode === self::MODE_ONE) {
+                    $result = $stmt->fetch();
+                } elseif ($mode === self::MODE_ALL) {
+                    $result = $stmt->fetchAll();
+                }
+                // the statement is reused: free the rows not fetched
+                $stmt->closeCursor();
+                return $result;
+            });
         } catch (PDOException $e) {
-            Logger::log("error", $function, $query);
+            Logger::log("error", $function, $query, Logger::ERROR);
+            if (self::inTransaction()) {
+                // the caller rolls back the whole transaction
+                throw $e;
+            }
             Logger::error(__FUNCTION__, "(" . $function . ") " . $e->getMessage());
+        } finally {
+            QueryProfiler::record($function, $query, $params, (microtime(true) - $start) * 1000);
         }
 
         Logger::logVar($function, "sql", $result);
@@ -71,24 +121,34 @@ class QueryExecutor {
      * @return void
      */
     public static function execute(string $function, string $query, ?array $params = null): void {
-        global $pdo, $debug_mysql;
+        global $debug_mysql;
 
         if ($debug_mysql) {
             echo "<pre>$query</pre>";
         }
 
         Logger::log($function, "sql", $query);
+        self::$queryCount++;
+        $start = microtime(true);
 
         try {
-            $stmt = $pdo->prepare($query);
-            if ($params !== null) {
-                $stmt->execute($params);
-            } else {
-                $stmt->execute();
-            }
+            self::run(false, function (PDO $pdo) use ($query, $params) {
+                $stmt = self::prepare($pdo, $query);
+                if ($params !== null) {
+                    $stmt->execute($params);
+                } else {
+                    $stmt->execute();
+                }
+            });
         } catch (PDOException $e) {
-            Logger::log("error", $function, $query);
+            Logger::log("error", $function, $query, Logger::ERROR);
+            if (self::inTransaction()) {
+                // the caller rolls back the whole transaction
+                throw $e;
+            }
             Logger::error(__FUNCTION__, "(" . $function . ") " . $e->getMessage());
+        } finally {
+            QueryProfiler::record($function, $query, $params, (microtime(true) - $start) * 1000);
         }
     }
 
@@ -101,25 +161,244 @@ class QueryExecutor {
      * @return string Last insert ID
      */
     public static function insert(string $function, string $query, array $data): string {
-        global $pdo, $debug_mysql;
+        global $debug_mysql;
 
         if ($debug_mysql) {
             echo "<pre>$query</pre>";
         }
 
         Logger::log($function, "sql", $query);
+        self::$queryCount++;
+        $start = microtime(true);
 
         try {
-            $stmt = $pdo->prepare($query);
-            $stmt->execute($data);
-            $lastId = $pdo->lastInsertId();
-            return $lastId;
+            return self::run(false, function (PDO $pdo) use ($query, $data) {
+                $stmt = self::prepare($pdo, $query);
+                $stmt->execute($data);
+                return $pdo->lastInsertId();
+            });
         } catch (PDOException $e) {
-            Logger::log("error", $function, $query);
+            Logger::log("error", $function, $query, Logger::ERROR);
+            if (self::inTransaction()) {
+                // the caller rolls back the whole transaction
+                throw $e;
+            }
             Logger::error(__FUNCTION__, "(" . $function . ") " . $e->getMessage());
+        } finally {
+            QueryProfiler::record($function, $query, $data, (microtime(true) - $start) * 1000);
         }
     }
 
+    /**
+     * Execute an INSERT on a unique key: the row is claimed, or another one already holds the key
+     *
+     * @param string $function Calling function name (for logging)
+     * @param string $query SQL query (INSERT, without IGNORE)
+     * @param array|null $params Query parameters
+     * @return bool False if the unique key is already taken (or on error), true otherwise
+     */
+    public static function claim(string $function, string $query, ?array $params = null): bool {
+        global $debug_mysql;
+
+        if ($debug_mysql) {
+            echo "<pre>$query</pre>";
+        }
+
+        Logger::log($function, "sql", $query);
+        self::$queryCount++;
+        $start = microtime(true);
+
+        try {
+            self::run(false, function (PDO $pdo) use ($query, $params) {
+                $stmt = self::prepare($pdo, $query);
+                $stmt->execute($params);
+            });
+            return true;
+        } catch (PDOException $e) {
+            // 1062 : Duplicate entry for key
+            if (($e->errorInfo[1] ?? 0) == 1062) {
+                Logger::log($function, "claim", "duplicate key");
+                return false;
+            }
+            Logger::log("error", $function, $query, Logger::ERROR);
+            if (self::inTransaction()) {
+                throw $e;
+            }
+            Logger::error(__FUNCTION__, "(" . $function . ") " . $e->getMessage());
+            return false;
+        } finally {
+            QueryProfiler::record($function, $query, $params, (microtime(true) - $start) * 1000);
+        }
+    }
+
+    /**
+     * Update many rows of a table in one statement per chunk
+     *
+     * Each row holds the key column and the columns to set, all rows having the same columns:
+     *   UPDATE `table` AS t JOIN (SELECT ? AS `key`, ? AS `col` UNION ALL SELECT ?, ? ...) AS v
+     *   ON t.`key`=v.`key` SET t.`col`=v.`col`
+     *
+     * @param string $function Calling function name (for logging)
+     * @param string $table Table name
+     * @param string $key Key column used to match the rows
+     * @param array $rows List of rows (column => value), each one including the key column
+     * @return void
+     */
+    public static function bulkUpdate(string $function, string $table, string $key, array $rows): void {
+        if (count($rows) === 0) {
+            return;
+        }
+
+        $columns = array_keys(reset($rows));
+        $sets = [];
+        foreach ($columns as $column) {
+            if ($column !== $key) {
+                $sets[] = "t.`$column`=v.`$column`";
+            }
+        }
+
+        $aliases = [];
+        foreach ($columns as $column) {
+            $aliases[] = "? AS `$column`";
+        }
+        $first = "SELECT " . implode(", ", $aliases);
+        $next = "SELECT " . implode(", ", array_fill(0, count($columns), "?"));
+
+        foreach (array_chunk($rows, self::BULK_CHUNK) as $chunk) {
+            $selects = [];
+            $params = [];
+            foreach ($chunk as $row) {
+                $selects[] = count($selects) ? $next : $first;
+                foreach ($columns as $column) {
+                    $params[] = $row[$column];
+                }
+            }
+
+            $query = "UPDATE `$table` AS t JOIN (" . implode(" UNION ALL ", $selects) . ") AS v ";
+            $query .= "ON t.`$key`=v.`$key` SET " . implode(", ", $sets);
+            self::execute($function, $query, $params);
+            self::$savedCount += count($chunk) - 1;
+        }
+    }
+
+    /**
+     * Run a statement on the connection (opened on first use)
+     *
+     * Reads go to the replica when there is one (see Connection::getRead()),
+     * writes go to the primary and send the next reads of the session to the primary.
+     * If the connection was lost ("server has gone away"), it is reopened and the
+     * statement is run again, except inside a transaction: the previous statements
+     * of the transaction are lost with the connection.
+     *
+     * @param bool $read True for a read (SELECT)
+     * @param callable $body Function running the statement, receiving the PDO connection
+     * @return mixed Result of $body
+     * @throws PDOException
+     */
+    private static function run(bool $read, callable $body) {
+        if ($read) {
+            $pdo = Connection::getRead();
+        } else {
+            $pdo = Connection::get();
+            Connection::markWrite();
+        }
+        $inTransaction = $pdo->inTransaction();
+
+        try {
+            return $body($pdo);
+        } catch (PDOException $e) {
+            if ($inTransaction || !Connection::isGoneAway($e)) {
+                throw $e;
+            }
+            Connection::reconnect(Connection::isReplica($pdo));
+            return $body($read ? Connection::getRead() : Connection::get());
+        }
+    }
+
+    /**
+     * Get a prepared statement from the cache, or prepare it on the server
+     *
+     * The cache is an LRU keyed by SQL text: queries written with placeholders are
+     * prepared once per connection and reused, e.g. in the loops over days or Top7 teams.
+     *
+     * @param PDO $pdo Database connection
+     * @param string $query SQL query
+     * @return \PDOStatement Prepared statement
+     */
+    private static function prepare(PDO $pdo, string $query): \PDOStatement {
+        $id = spl_object_id($pdo);
+        if (!isset(self::$statements[$id])) {
+            self::$statements[$id] = [];
+        }
+        $statements = &self::$statements[$id];
+
+        if (isset($statements[$query])) {
+            self::$cacheHits++;
+            // move to the end: most recently used
+            $stmt = $statements[$query];
+            unset($statements[$query]);
+            $statements[$query] = $stmt;
+            return $stmt;
+        }
+
+        self::$cacheMisses++;
+        $stmt = $pdo->prepare($query);
+        $statements[$query] = $stmt;
+        if (count($statements) > self::STATEMENT_CACHE_SIZE) {
+            unset($statements[array_key_first($statements)]);
+        }
+
+        return $stmt;
+    }
+
+    /**
+     * Get the statement cache counters
+     *
+     * @return array ['hits' => int, 'misses' => int, 'size' => int]
+     */
+    public static function getCacheStats(): array {
+        return [
+            'hits' => self::$cacheHits,
+            'misses' => self::$cacheMisses,
+            'size' => array_sum(array_map('count', self::$statements)),
+        ];
+    }
+
+    /**
+     * Empty the statement cache (e.g. before closing the connection)
+     */
+    public static function clearStatementCache(): void {
+        self::$statements = [];
+    }
+
+    /**
+     * Get the number of statements sent to the server since the start of the request
+     *
+     * @return int Number of statements
+     */
+    public static function getQueryCount(): int {
+        return self::$queryCount;
+    }
+
+    /**
+     * Get the number of round trips saved by bulkUpdate() compared to one UPDATE per row
+     *
+     * @return int Number of statements saved
+     */
+    public static function getSavedCount(): int {
+        return self::$savedCount;
+    }
+
+    /**
+     * Reset the statement counters
+     */
+    public static function resetQueryCount(): void {
+        self::$queryCount = 0;
+        self::$savedCount = 0;
+        self::$cacheHits = 0;
+        self::$cacheMisses = 0;
+    }
+
     /**
      * Execute a raw query (use with caution)
      *
@@ -127,14 +406,19 @@ class QueryExecutor {
      * @return bool Success status
      */
     public static function raw(string $query): bool {
-        global $pdo;
+        self::$queryCount++;
+        $start = microtime(true);
 
         try {
-            $pdo->exec($query);
+            self::run(false, function (PDO $pdo) use ($query) {
+                $pdo->exec($query);
+            });
             return true;
         } catch (PDOException $e) {
             Logger::error(__FUNCTION__, $e->getMessage());
             return false;
+        } finally {
+            QueryProfiler::record('raw', $query, null, (microtime(true) - $start) * 1000);
         }
     }
 
@@ -144,8 +428,22 @@ class QueryExecutor {
      * @return bool Success status
      */
     public static function beginTransaction(): bool {
-        global $pdo;
-        return $pdo->beginTransaction();
+        return self::run(false, function (PDO $pdo) {
+            return $pdo->beginTransaction();
+        });
+    }
+
+    /**
+     * Check if a transaction is open on the primary
+     *
+     * In a transaction, fetch(), execute(), insert() and claim() throw the PDOException of a failed
+     * statement instead of stopping the request: the caller rolls back.
+     *
+     * @return bool True if a transaction is open
+     */
+    public static function inTransaction(): bool {
+        $pdo = Connection::getInstance();
+        return $pdo !== null && $pdo->inTransaction();
     }
 
     /**
@@ -154,8 +452,7 @@ class QueryExecutor {
      * @return bool Success status
      */
     public static function commit(): bool {
-        global $pdo;
-        return $pdo->commit();
+        return Connection::get()->commit();
     }
 
     /**
@@ -164,7 +461,6 @@ class QueryExecutor {
      * @return bool Success status
      */
     public static function rollback(): bool {
-        global $pdo;
-        return $pdo->rollBack();
+        return Connection::get()->rollBack();
     }
 }
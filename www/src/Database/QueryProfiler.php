@@ -0,0 +1,330 @@
+<?php
+/**
+ * QueryProfiler - Per-request SQL Instrumentation
+ *
+ * QueryExecutor reports the duration of every statement with its calling function.
+ * At the end of the request the profiler:
+ * - sends a Server-Timing header (number of queries, SQL time, slowest functions) when
+ *   c_sql_timing is enabled (off by default), and only in debug mode or to an admin session:
+ *   the header names internal functions. common.inc calls start() so that the page is
+ *   buffered before any output. If the headers are already sent (output before common.inc,
+ *   or an explicit flush), an HTML page gets the timing in a comment at its end instead
+ * - writes the statements slower than c_sql_slow_ms to the slow-query log, with their EXPLAIN plan
+ * - prints a summary at the bottom of the page when the footer is enabled
+ *   (c_sql_footer, or ?sql_profile=1 in debug mode), with the queries avoided by RequestCache
+ *
+ * @package Top7\Database
+ */
+
+namespace Top7\Database;
+
+use PDO;
+use PDOException;
+use Top7\Utils\RequestCache;
+
+class QueryProfiler {
+
+    /**
+     * Maximum number of slow statements explained per request
+     */
+    const MAX_EXPLAIN = 10;
+
+    /**
+     * Number of functions detailed in the Server-Timing header
+     */
+    const TOP_FUNCTIONS = 3;
+
+    /**
+     * @var bool True once the end of request handler is registered
+     */
+    private static $started = false;
+
+    /**
+     * @var int Number of statements
+     */
+    private static $count = 0;
+
+    /**
+     * @var float Total SQL time (ms)
+     */
+    private static $time = 0.0;
+
+    /**
+     * @var array Statistics by calling function: ['count' => int, 'time' => float]
+     */
+    private static $functions = [];
+
+    /**
+     * @var array Slow statements: function, time, query, params
+     */
+    private static $slow = [];
+
+    /**
+     * @var array|null Statements captured (function, query, params), null when not capturing
+     */
+    private static $captured = null;
+
+    /**
+     * Register the end of request handler
+     *
+     * Called by common.inc before any output: the page output is buffered so that
+     * the Server-Timing header can still be sent at the end.
+     */
+    public static function start(): void {
+        if (self::$started) {
+            return;
+        }
+        self::$started = true;
+
+        if (self::timingEnabled() && !headers_sent()) {
+            ob_start();
+        }
+        register_shutdown_function([self::class, 'finish']);
+    }
+
+    /**
+     * Record one statement
+     *
+     * @param string $function Calling function name
+     * @param string $query SQL query
+     * @param array|null $params Query parameters
+     * @param float $ms Duration (ms)
+     */
+    public static function record(string $function, string $query, ?array $params, float $ms): void {
+        self::start();
+
+        self::$count++;
+        self::$time += $ms;
+        if (!isset(self::$functions[$function])) {
+            self::$functions[$function] = ['count' => 0, 'time' => 0.0];
+        }
+        self::$functions[$function]['count']++;
+        self::$functions[$function]['time'] += $ms;
+
+        if (self::$captured !== null) {
+            self::$captured[] = ['function' => $function, 'query' => $query, 'params' => $params];
+        }
+
+        $threshold = defined('c_sql_slow_ms') ? c_sql_slow_ms : 0;
+        if ($threshold > 0 && $ms >= $threshold) {
+            self::$slow[] = ['function' => $function, 'time' => $ms, 'query' => $query, 'params' => $params];
+        }
+    }
+
+    /**
+     * Start capturing the statements (used by the query audit)
+     */
+    public static function startCapture(): void {
+        self::$captured = [];
+    }
+
+    /**
+     * Stop capturing the statements
+     *
+     * @return array Statements captured since startCapture(): function, query, params
+     */
+    public static function stopCapture(): array {
+        $captured = self::$captured ?? [];
+        self::$captured = null;
+
+        return $captured;
+    }
+
+    /**
+     * Get the statistics of the request
+     *
+     * @return array ['count' => int, 'time' => float, 'functions' => array sorted by time desc]
+     */
+    public static function getSummary(): array {
+        $functions = self::$functions;
+        uasort($functions, function ($a, $b) {
+            return $b['time'] <=> $a['time'];
+        });
+
+        return ['count' => self::$count, 'time' => self::$time, 'functions' => $functions];
+    }
+
+    /**
+     * Build the Server-Timing header value
+     *
+     * @return string e.g. db;dur=12.5;desc="18 queries", sql-get_rank7;dur=4.2;desc="3 queries"
+     */
+    public static function serverTiming(): string {
+        $summary = self::getSummary();
+        $metrics = [sprintf('db;dur=%.1f;desc="%d queries"', $summary['time'], $summary['count'])];
+        foreach (array_slice($summary['functions'], 0, self::TOP_FUNCTIONS, true) as $function => $stats) {
+            $name = preg_replace('/[^A-Za-z0-9_-]/', '_', $function);
+            $metrics[] = sprintf('sql-%s;dur=%.1f;desc="%d queries"', $name, $stats['time'], $stats['count']);
+        }
+        if (isset($_SERVER['REQUEST_TIME_FLOAT'])) {
+            $metrics[] = sprintf('total;dur=%.1f', (microtime(true) - $_SERVER['REQUEST_TIME_FLOAT']) * 1000);
+        }
+
+        return implode(', ', $metrics);
+    }
+
+    /**
+     * End of request: header, slow-query log, footer
+     */
+    public static function finish(): void {
+        if (self::$count === 0) {
+            return;
+        }
+
+        if (self::timingEnabled() && self::timingAllowed()) {
+            if (!headers_sent()) {
+                header('Server-Timing: ' . self::serverTiming());
+            } elseif (self::isHtml()) {
+                // too late for the header: at the end of the page
+                echo "\n<!-- Server-Timing: " . self::serverTiming() . " -->\n";
+            }
+        }
+
+        if (count(self::$slow)) {
+            self::writeSlowLog();
+        }
+
+        if (self::footerEnabled() && self::isHtml()) {
+            echo self::footer();
+        }
+    }
+
+    /**
+     * Write the slow statements to the slow-query log (one JSON object per line)
+     */
+    private static function writeSlowLog(): void {
+        global $log_path;
+
+        $lines = '';
+        foreach (self::$slow as $i => $slow) {
+            $entry = [
+                'date' => date('Y-m-d H:i:s'),
+                'uri' => $_SERVER['REQUEST_URI'] ?? ($_SERVER['argv'][0] ?? ''),
+                'function' => $slow['function'],
+                'time' => round($slow['time'], 1),
+                'query' => $slow['query'],
+                'params' => $slow['params'],
+                'explain' => $i < self::MAX_EXPLAIN ? self::explain($slow['query'], $slow['params']) : null,
+            ];
+            $lines .= json_encode($entry, JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES) . PHP_EOL;
+        }
+
+        @file_put_contents(($log_path ?? '/tmp') . '/slow_sql_' . date('Ymd') . '.log', $lines, FILE_APPEND | LOCK_EX);
+    }
+
+    /**
+     * Get the plan of a statement
+     *
+     * @param string $query SQL query
+     * @param array|null $params Query parameters
+     * @return array|null EXPLAIN rows, null if the statement can not be explained
+     */
+    public static function explain(string $query, ?array $params): ?array {
+        $pdo = Connection::getInstance();
+
+        if (!$pdo instanceof PDO || !preg_match('/^\s*(select|update|delete|insert|replace)\b/i', $query)) {
+            return null;
+        }
+
+        try {
+            $stmt = $pdo->prepare('EXPLAIN ' . $query);
+            $stmt->execute($params);
+            return $stmt->fetchAll(PDO::FETCH_ASSOC);
+        } catch (PDOException $e) {
+            return null;
+        }
+    }
+
+    /**
+     * Check if the Server-Timing header is enabled (c_sql_timing, web requests):
+     * the pages are then buffered
+     *
+     * @return bool True if enabled
+     */
+    private static function timingEnabled(): bool {
+        if (php_sapi_name() === 'cli') {
+            return false;
+        }
+
+        return defined('c_sql_timing') && c_sql_timing;
+    }
+
+    /**
+     * Check if the timing can be sent to this client: debug mode or admin session
+     * (end of request, the session is open)
+     *
+     * @return bool True if allowed
+     */
+    private static function timingAllowed(): bool {
+        global $debug;
+
+        if (!empty($debug)) {
+            return true;
+        }
+
+        return defined('c_admin') && ($_SESSION['mode'] ?? null) == c_admin;
+    }
+
+    /**
+     * Check if the SQL summary must be printed at the bottom of the page
+     *
+     * @return bool True if enabled
+     */
+    private static function footerEnabled(): bool {
+        global $debug;
+
+        if (php_sapi_name() === 'cli') {
+            return false;
+        }
+
+        return (defined('c_sql_footer') && c_sql_footer) || (!empty($debug) && isset($_GET['sql_profile']));
+    }
+
+    /**
+     * Check if the response is an HTML page (not JSON, not a redirection)
+     *
+     * @return bool True for HTML
+     */
+    private static function isHtml(): bool {
+        if (http_response_code() === 304) {
+            return false;
+        }
+        foreach (headers_list() as $header) {
+            if (stripos($header, 'Location:') === 0) {
+                return false;
+            }
+            if (stripos($header, 'Content-Type:') === 0 && stripos($header, 'text/html') === false) {
+                return false;
+            }
+        }
+
+        return true;
+    }
+
+    /**
+     * Build the SQL summary of the page
+     *
+     * @return string HTML
+     */
+    private static function footer(): string {
+        $summary = self::getSummary();
+        $html = "<div id=\"sql-profile\" style=\"font: 11px monospace; margin: 1em;\">\n";
+        $html .= sprintf("<b>%d queries, %.1f ms</b>", $summary['count'], $summary['time']);
+        if (count(self::$slow)) {
+            $html .= sprintf(" - %d slow", count(self::$slow));
+        }
+        $html .= sprintf(" - %d avoided (request cache)", RequestCache::getStats()['hits']);
+        $html .= "\n<table>\n";
+        foreach ($summary['functions'] as $function => $stats) {
+            $html .= sprintf(
+                "<tr><td>%s</td><td align=\"right\">%d</td><td align=\"right\">%.1f ms</td></tr>\n",
+                htmlspecialchars($function),
+                $stats['count'],
+                $stats['time']
+            );
+        }
+        $html .= "</table>\n</div>\n";
+
+        return $html;
+    }
+}
@@ -1,9 +1,25 @@
 <?php
 namespace Top7\Display;
 
+use Top7\Utils\Cache;
+
 class PageRenderer {
 
-    public static function header(string $pageClass = '', string $title = 'Top7'): void {
+    /**
+     * Print the page header
+     *
+     * With $versions, the request is conditional first (see conditional()): a current
+     * client copy gets a 304 and nothing is printed.
+     *
+     * @param string $pageClass CSS class of the page
+     * @param string $title Page title
+     * @param array $versions Cache version names of the data shown
+     * @param array $context View parameters (season, day, player, ...)
+     */
+    public static function header(string $pageClass = '', string $title = 'Top7', array $versions = [], array $context = []): void {
+        if (count($versions)) {
+            self::conditional($versions, $context);
+        }
         ?>
         <!DOCTYPE html>
         <html lang="fr" class="<?= htmlspecialchars($pageClass) ?>">
@@ -29,6 +45,51 @@ class PageRenderer {
         <?php
     }
 
+    /**
+     * Conditional GET: send the validators of the response, answer 304 and stop if the client copy is current
+     *
+     * The ETag hashes the view parameters and the versions of the data shown (Cache::version()),
+     * so it changes with the next write of that data. Last-Modified is the time of the last bump.
+     * To call before any output and before the queries of the page.
+     *
+     * @param array $versions Cache version names of the data shown (e.g. "season_11", "team_42")
+     * @param array $context View parameters (season, day, player, ...)
+     */
+    public static function conditional(array $versions, array $context = []): void {
+        $method = $_SERVER['REQUEST_METHOD'] ?? 'GET';
+        if (($method !== 'GET' && $method !== 'HEAD') || headers_sent()) {
+            return;
+        }
+
+        $values = [];
+        $lastModified = 0;
+        foreach ($versions as $name) {
+            $values[$name] = Cache::version($name);
+            $lastModified = max($lastModified, Cache::versionTime($name));
+        }
+        $etag = '"' . md5(serialize([$context, $values])) . '"';
+
+        header('ETag: ' . $etag);
+        if ($lastModified) {
+            header('Last-Modified: ' . gmdate('D, d M Y H:i:s', $lastModified) . ' GMT');
+        }
+        // session pages: the browser keeps its copy but checks it on every request
+        header('Cache-Control: private, no-cache');
+
+        // the context is not in Last-Modified: only the ETag can validate
+        $match = $_SERVER['HTTP_IF_NONE_MATCH'] ?? '';
+        foreach (explode(',', $match) as $candidate) {
+            $candidate = trim($candidate);
+            if (strpos($candidate, 'W/') === 0) {
+                $candidate = substr($candidate, 2);
+            }
+            if ($candidate === $etag || $candidate === '*') {
+                http_response_code(304);
+                exit;
+            }
+        }
+    }
+
     public static function footer(): void {
         ?>
         </body>
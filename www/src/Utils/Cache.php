@@ -0,0 +1,378 @@
+<?php
+/**
+ * Cache - Application Data Cache
+ *
+ * Stores computed results (standings, records, ...) in APCu when available,
+ * with a file fallback (CLI, hosts without APCu). The file cache is bounded:
+ * the oldest entries are evicted when it grows over MAX_FILES.
+ *
+ * Cached data is invalidated with version counters: callers put the version
+ * of the data in the key, and bump the version when the data changes.
+ * Versions are kept in files so that the web server and the CLI scripts
+ * (result import, cron) share them.
+ *
+ * Shared entries ($shared) are kept in files too, whatever the APCu support:
+ * a CLI script can compute them for the web server (pre-warm). They are not evicted.
+ *
+ * @package Top7\Utils
+ */
+
+namespace Top7\Utils;
+
+class Cache {
+
+    /**
+     * Maximum number of entries in the file cache
+     */
+    const MAX_FILES = 500;
+
+    /**
+     * Default time to live of an entry (seconds)
+     */
+    const TTL = 86400;
+
+    /**
+     * Prefix of the APCu keys (the APCu memory is shared by all the sites of the server)
+     */
+    const PREFIX = 'top7:';
+
+    /**
+     * Number of counts kept in APCu before they are moved to the counter file
+     */
+    const COUNTER_FLUSH = 100;
+
+    /**
+     * @var string|null Path to cache directory
+     */
+    private static $path = null;
+
+    /**
+     * @var array Versions already read during this request
+     */
+    private static $versions = [];
+
+    /**
+     * Initialize cache with its directory
+     *
+     * @param string $path Path to cache directory
+     */
+    public static function init(string $path): void {
+        self::$path = $path;
+    }
+
+    /**
+     * Get cached value
+     *
+     * @param string $key Cache key
+     * @param bool $shared True for an entry shared with the CLI scripts
+     * @return mixed|null Cached value or null if not found
+     */
+    public static function get(string $key, bool $shared = false) {
+        if (!$shared && self::useApcu()) {
+            $value = apcu_fetch(self::PREFIX . $key, $success);
+            return $success ? $value : null;
+        }
+
+        $file = self::file($key, $shared);
+        $data = @file_get_contents($file);
+        if ($data === false) {
+            return null;
+        }
+
+        $entry = unserialize($data);
+        if (!is_array($entry) || ($entry['expire'] && $entry['expire'] < time())) {
+            @unlink($file);
+            return null;
+        }
+
+        return $entry['value'];
+    }
+
+    /**
+     * Store value in cache
+     *
+     * @param string $key Cache key
+     * @param mixed $value Value to store (must not be null)
+     * @param int $ttl Time to live in seconds (0 : no expiration)
+     * @param bool $shared True for an entry shared with the CLI scripts
+     */
+    public static function set(string $key, $value, int $ttl = self::TTL, bool $shared = false): void {
+        if (!$shared && self::useApcu()) {
+            apcu_store(self::PREFIX . $key, $value, $ttl);
+            return;
+        }
+
+        $dir = self::dir();
+        if (!is_dir($dir) && !@mkdir($dir, 0775, true)) {
+            return;
+        }
+
+        // write then rename: readers never see a partial entry
+        $file = self::file($key, $shared);
+        $tmp = $file . '.' . getmypid();
+        $entry = ['expire' => $ttl ? time() + $ttl : 0, 'value' => $value];
+        if (@file_put_contents($tmp, serialize($entry)) !== false) {
+            @rename($tmp, $file);
+        }
+
+        // evict from time to time, not on every write
+        if (!$shared && mt_rand(1, 50) === 1) {
+            self::evict();
+        }
+    }
+
+    /**
+     * Get cached value, computing and storing it on a miss
+     *
+     * @param string $key Cache key
+     * @param callable $compute Function returning the value
+     * @param int $ttl Time to live in seconds
+     * @param bool $shared True for an entry shared with the CLI scripts
+     * @return mixed Value
+     */
+    public static function remember(string $key, callable $compute, int $ttl = self::TTL, bool $shared = false) {
+        $value = self::get($key, $shared);
+        if ($value === null) {
+            $value = $compute();
+            if ($value !== null) {
+                self::set($key, $value, $ttl, $shared);
+            }
+        }
+
+        return $value;
+    }
+
+    /**
+     * Remove a value from cache
+     *
+     * @param string $key Cache key
+     * @param bool $shared True for an entry shared with the CLI scripts
+     */
+    public static function delete(string $key, bool $shared = false): void {
+        if (!$shared && self::useApcu()) {
+            apcu_delete(self::PREFIX . $key);
+            return;
+        }
+
+        @unlink(self::file($key, $shared));
+    }
+
+    /**
+     * Get the current version of a data set
+     *
+     * @param string $name Version name (e.g. "season_11")
+     * @return int Version (0 if never bumped)
+     */
+    public static function version(string $name): int {
+        if (!isset(self::$versions[$name])) {
+            $data = @file_get_contents(self::versionFile($name));
+            self::$versions[$name] = $data === false ? 0 : intval($data);
+        }
+
+        return self::$versions[$name];
+    }
+
+    /**
+     * Get the time of the last bump of a data set
+     *
+     * @param string $name Version name
+     * @return int Unix time (0 if never bumped)
+     */
+    public static function versionTime(string $name): int {
+        $time = @filemtime(self::versionFile($name));
+        return $time === false ? 0 : $time;
+    }
+
+    /**
+     * Increment the version of a data set: every key built with the previous version is invalidated
+     *
+     * @param string $name Version name
+     * @return int New version
+     */
+    public static function bump(string $name): int {
+        $dir = self::dir();
+        if (!is_dir($dir)) {
+            @mkdir($dir, 0775, true);
+        }
+
+        $fp = @fopen(self::versionFile($name), 'c+');
+        if ($fp === false) {
+            return self::version($name);
+        }
+
+        flock($fp, LOCK_EX);
+        $version = intval(stream_get_contents($fp)) + 1;
+        ftruncate($fp, 0);
+        rewind($fp);
+        fwrite($fp, (string)$version);
+        fflush($fp);
+        flock($fp, LOCK_UN);
+        fclose($fp);
+
+        self::$versions[$name] = $version;
+        return $version;
+    }
+
+    /**
+     * Increment a counter (metrics)
+     *
+     * Web requests count in APCu (apcu_inc, no lock), and move the count to the counter
+     * file every COUNTER_FLUSH so that the CLI scripts, which do not see the APCu memory
+     * of the server, can read it. Without APCu (CLI, hosts without APCu), every increment
+     * goes to the file under a lock.
+     *
+     * @param string $name Counter name
+     * @param int $step Increment
+     */
+    public static function increment(string $name, int $step = 1): void {
+        if (self::useApcuCounters()) {
+            $key = self::PREFIX . 'counter_' . $name;
+            apcu_add($key, 0, 0);
+            $pending = apcu_inc($key, $step);
+            if ($pending === false) {
+                self::addToCounterFile($name, $step);
+                return;
+            }
+
+            // only the increment which crosses the threshold flushes
+            if ($pending >= self::COUNTER_FLUSH && $pending - $step < self::COUNTER_FLUSH) {
+                apcu_dec($key, $pending);
+                self::addToCounterFile($name, $pending);
+            }
+            return;
+        }
+
+        self::addToCounterFile($name, $step);
+    }
+
+    /**
+     * Get the value of a counter
+     *
+     * In a web request, the count not yet flushed from APCu is added. The CLI scripts
+     * read the file only: up to COUNTER_FLUSH - 1 counts can still be pending in the server.
+     *
+     * @param string $name Counter name
+     * @return int Value (0 if never incremented)
+     */
+    public static function counter(string $name): int {
+        $data = @file_get_contents(self::counterFile($name));
+        $value = $data === false ? 0 : intval($data);
+
+        if (self::useApcuCounters()) {
+            $pending = apcu_fetch(self::PREFIX . 'counter_' . $name, $success);
+            if ($success) {
+                $value += intval($pending);
+            }
+        }
+
+        return $value;
+    }
+
+    /**
+     * Add to the counter file, under a lock
+     *
+     * @param string $name Counter name
+     * @param int $step Increment
+     */
+    private static function addToCounterFile(string $name, int $step): void {
+        $dir = self::dir();
+        if (!is_dir($dir) && !@mkdir($dir, 0775, true)) {
+            return;
+        }
+
+        $fp = @fopen(self::counterFile($name), 'c+');
+        if ($fp === false) {
+            return;
+        }
+
+        flock($fp, LOCK_EX);
+        $value = intval(stream_get_contents($fp)) + $step;
+        ftruncate($fp, 0);
+        rewind($fp);
+        fwrite($fp, (string)$value);
+        fflush($fp);
+        flock($fp, LOCK_UN);
+        fclose($fp);
+    }
+
+    /**
+     * Remove the oldest entries of the file cache over MAX_FILES
+     */
+    public static function evict(): void {
+        $files = glob(self::dir() . '/*.cache');
+        if ($files === false || count($files) <= self::MAX_FILES) {
+            return;
+        }
+
+        $mtimes = [];
+        foreach ($files as $file) {
+            $mtimes[$file] = @filemtime($file);
+        }
+        asort($mtimes);
+
+        foreach (array_slice(array_keys($mtimes), 0, count($files) - self::MAX_FILES) as $file) {
+            @unlink($file);
+        }
+    }
+
+    /**
+     * Check if APCu can be used
+     *
+     * @return bool True if APCu is available
+     */
+    private static function useApcu(): bool {
+        return function_exists('apcu_enabled') && apcu_enabled();
+    }
+
+    /**
+     * Check if the counters can be kept in APCu: web requests only,
+     * the APCu memory of a CLI script is lost when it exits
+     *
+     * @return bool True if APCu is available for the counters
+     */
+    private static function useApcuCounters(): bool {
+        return php_sapi_name() !== 'cli' && self::useApcu();
+    }
+
+    /**
+     * Get cache directory
+     *
+     * @return string Path to cache directory
+     */
+    private static function dir(): string {
+        global $log_path; // same base directory as the logs
+
+        return self::$path ?? (($log_path ?? '/tmp') . '/cache');
+    }
+
+    /**
+     * Get file of a cache entry
+     *
+     * @param string $key Cache key
+     * @param bool $shared True for a shared entry (not evicted)
+     * @return string File path
+     */
+    private static function file(string $key, bool $shared = false): string {
+        return self::dir() . '/' . md5($key) . ($shared ? '.shared' : '.cache');
+    }
+
+    /**
+     * Get file of a version counter
+     *
+     * @param string $name Version name
+     * @return string File path
+     */
+    private static function versionFile(string $name): string {
+        return self::dir() . '/version_' . preg_replace('/[^A-Za-z0-9_]/', '_', $name);
+    }
+
+    /**
+     * Get file of a counter
+     *
+     * @param string $name Counter name
+     * @return string File path
+     */
+    private static function counterFile(string $name): string {
+        return self::dir() . '/counter_' . preg_replace('/[^A-Za-z0-9_]/', '_', $name);
+    }
+}
@@ -66,6 +66,7 @@ class EmailService {
     public static function sendRegistration(string $pseudo, string $email, int $team, bool $captain, string $key): void {
         // This would be implemented by extracting send_email_register()
         // For now, call the legacy function
+        self::loadLegacy();
         if (function_exists('send_email_register')) {
             send_email_register($pseudo, $email, $team, $captain, $key);
         }
@@ -80,6 +81,7 @@ class EmailService {
     public static function sendPasswordReset(int $playerId, string $key): void {
         // This would be implemented by extracting send_email_password()
         // For now, call the legacy function
+        self::loadLegacy();
         if (function_exists('send_email_password')) {
             send_email_password($playerId, $key);
         }
@@ -93,11 +95,21 @@ class EmailService {
     public static function sendAlert(array $params): void {
         // This would be implemented by extracting send_email_alert_player()
         // For now, call the legacy function
+        self::loadLegacy();
         if (function_exists('send_email_alert_player')) {
             send_email_alert_player($params);
         }
     }
 
+    /**
+     * Load the legacy email functions (inc/email.inc) when common.inc is loaded
+     */
+    private static function loadLegacy(): void {
+        if (function_exists('load_module')) {
+            load_module("email");
+        }
+    }
+
     /**
      * Validate email syntax
      *
@@ -13,11 +13,49 @@ namespace Top7\Utils;
 
 class Logger {
 
+    /**
+     * Log levels
+     */
+    const DEBUG = 0;    // whitelisted functions only
+    const INFO = 1;     // whitelisted functions only
+    const WARNING = 2;  // always
+    const ERROR = 3;    // always
+
+    /**
+     * Number of buffered lines that triggers a write before the end of the request
+     */
+    const BUFFER_LINES = 200;
+
     /**
      * @var string Path to log directory
      */
     private static $logPath;
 
+    /**
+     * @var int Minimum level written
+     */
+    private static $level = self::DEBUG;
+
+    /**
+     * @var array Lines waiting to be written, by file
+     */
+    private static $buffer = [];
+
+    /**
+     * @var int Number of lines in the buffer
+     */
+    private static $bufferLines = 0;
+
+    /**
+     * @var bool True once the flush at the end of the request is registered
+     */
+    private static $flushRegistered = false;
+
+    /**
+     * @var array|null Whitelist as a set (function => true), built on first use
+     */
+    private static $enabled = null;
+
     /**
      * @var array Functions to debug (whitelist)
      */
@@ -69,35 +107,111 @@ class Logger {
         self::$logPath = $logPath;
     }
 
+    /**
+     * Set the minimum level written
+     *
+     * @param int $level Log level (DEBUG, INFO, WARNING, ERROR)
+     */
+    public static function setLevel(int $level): void {
+        self::$level = $level;
+    }
+
+    /**
+     * Check if a line of this function and level would be written
+     *
+     * Callers with an expensive message can check this before building it.
+     *
+     * @param string $function Function name calling the log
+     * @param int $level Log level
+     * @return bool True if enabled
+     */
+    public static function isEnabled(string $function, int $level = self::DEBUG): bool {
+        if ($level < self::$level) {
+            return false;
+        }
+        if ($level >= self::WARNING) {
+            return true;
+        }
+        if (self::$enabled === null) {
+            self::$enabled = array_fill_keys(self::$debugFunctions, true);
+        }
+
+        return isset(self::$enabled[$function]);
+    }
+
     /**
      * Log a message to file
      *
      * @param string $function Function name calling the log
      * @param string $name Variable/context name
      * @param string|null $msg Message to log
+     * @param int $level Log level
      */
-    public static function log(string $function, string $name, ?string $msg): void {
-        global $log_path; // For backward compatibility
-
-        $logPath = self::$logPath ?? $log_path ?? '/tmp';
-
-        // Only log if function is in debug whitelist
-        if (in_array($function, self::$debugFunctions)) {
-            $msgStr = $msg ?? 'NULL';
-            $log = date("Ymd G:i:s ") . $function . ' [' . $name . '] ' . $msgStr . PHP_EOL;
-            file_put_contents($logPath . '/log_' . date("Ymd") . '.txt', $log, FILE_APPEND);
+    public static function log(string $function, string $name, ?string $msg, int $level = self::DEBUG): void {
+        if (!self::isEnabled($function, $level)) {
+            return;
         }
+
+        self::write($function . ' [' . $name . '] ' . ($msg ?? 'NULL'));
     }
 
     /**
      * Log a variable with var_export
      *
+     * The variable is exported only if the function is enabled. A Closure is called
+     * only in that case too: use it for values which are expensive to build.
+     *
      * @param string $function Function name calling the log
      * @param string $name Variable name
-     * @param mixed $var Variable to log
+     * @param mixed $var Variable to log, or Closure returning it
+     * @param int $level Log level
+     */
+    public static function logVar(string $function, string $name, $var, int $level = self::DEBUG): void {
+        if (!self::isEnabled($function, $level)) {
+            return;
+        }
+
+        if ($var instanceof \Closure) {
+            $var = $var();
+        }
+        self::write($function . ' [' . $name . '] ' . var_export($var, true));
+    }
+
+    /**
+     * Write the buffered lines to the log files, one locked append per file
+     */
+    public static function flush(): void {
+        foreach (self::$buffer as $file => $lines) {
+            @file_put_contents($file, $lines, FILE_APPEND | LOCK_EX);
+        }
+        self::$buffer = [];
+        self::$bufferLines = 0;
+    }
+
+    /**
+     * Add a line to the buffer of the daily log file
+     *
+     * @param string $line Line without date
      */
-    public static function logVar(string $function, string $name, $var): void {
-        self::log($function, $name, var_export($var, true));
+    private static function write(string $line): void {
+        global $log_path; // For backward compatibility
+
+        $logPath = self::$logPath ?? $log_path ?? '/tmp';
+        $file = $logPath . '/log_' . date("Ymd") . '.txt';
+
+        if (!isset(self::$buffer[$file])) {
+            self::$buffer[$file] = '';
+        }
+        self::$buffer[$file] .= date("Ymd G:i:s ") . $line . PHP_EOL;
+        self::$bufferLines++;
+
+        if (!self::$flushRegistered) {
+            self::$flushRegistered = true;
+            register_shutdown_function([self::class, 'flush']);
+        }
+        if (self::$bufferLines >= self::BUFFER_LINES) {
+            self::flush();
+        }
     }
 
     /**
@@ -109,7 +223,8 @@ class Logger {
     public static function error(string $function, string $message): void {
         global $debug;
 
-        self::log(__FUNCTION__, $function, $message);
+        self::log(__FUNCTION__, $function, $message, self::ERROR);
+        self::flush();
 
         if ($debug === false) {
             header('location: index');
@@ -136,6 +251,7 @@ class Logger {
     public static function addDebugFunction(string $function): void {
         if (!in_array($function, self::$debugFunctions)) {
             self::$debugFunctions[] = $function;
+            self::$enabled = null;
         }
     }
 
@@ -148,6 +264,7 @@ class Logger {
         $key = array_search($function, self::$debugFunctions);
         if ($key !== false) {
             unset(self::$debugFunctions[$key]);
+            self::$enabled = null;
         }
     }
 
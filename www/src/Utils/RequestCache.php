@@ -0,0 +1,93 @@
+<?php
+/**
+ * RequestCache - Request-scoped Identity Map
+ *
+ * Keeps the rows read by the lookup helpers (player, team names, Top7 teams)
+ * for the rest of the request: the page builders call them many times with the
+ * same keys. One map per kind of row; the write helpers forget the entries they change.
+ *
+ * Nothing is shared between requests: the data cache is Cache.
+ *
+ * @package Top7\Utils
+ */
+
+namespace Top7\Utils;
+
+class RequestCache {
+
+    /**
+     * @var array Maps by name: key => value
+     */
+    private static $maps = [];
+
+    /**
+     * @var int Lookups answered from a map (queries avoided)
+     */
+    private static $hits = 0;
+
+    /**
+     * @var int Lookups computed
+     */
+    private static $misses = 0;
+
+    /**
+     * Get a value, computing and keeping it on a miss
+     *
+     * @param string $map Map name
+     * @param int|string $key Key in the map
+     * @param callable $compute Function returning the value (null and false are kept too)
+     * @return mixed Value
+     */
+    public static function remember(string $map, $key, callable $compute) {
+        if (isset(self::$maps[$map]) && array_key_exists($key, self::$maps[$map])) {
+            self::$hits++;
+            return self::$maps[$map][$key];
+        }
+
+        self::$misses++;
+        $value = $compute();
+        self::$maps[$map][$key] = $value;
+
+        return $value;
+    }
+
+    /**
+     * Keep several values at once (bulk load)
+     *
+     * @param string $map Map name
+     * @param array $values key => value
+     */
+    public static function preload(string $map, array $values): void {
+        self::$maps[$map] = $values + (self::$maps[$map] ?? []);
+    }
+
+    /**
+     * Forget a value after a write, or a whole map
+     *
+     * @param string $map Map name
+     * @param int|string|null $key Key in the map, null for the whole map
+     */
+    public static function forget(string $map, $key = null): void {
+        if ($key === null) {
+            unset(self::$maps[$map]);
+        } else {
+            unset(self::$maps[$map][$key]);
+        }
+    }
+
+    /**
+     * Forget every map
+     */
+    public static function clear(): void {
+        self::$maps = [];
+    }
+
+    /**
+     * Get the statistics of the request
+     *
+     * @return array ['hits' => queries avoided, 'misses' => lookups computed]
+     */
+    public static function getStats(): array {
+        return ['hits' => self::$hits, 'misses' => self::$misses];
+    }
+}
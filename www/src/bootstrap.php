@@ -7,6 +7,8 @@
  * - Configuration loading
  * - Legacy constants support
  *
+ * Loaded by common.inc: the classes are loaded on first use, not on every request.
+ *
  * @package Top7
  * @since Phase 1, Task 1.2.1
  */
@@ -29,19 +31,20 @@ spl_autoload_register(function ($class) {
     }
 });
 
-// Load configuration
-$ovh_path    = dirname(__DIR__) . "/conf/conf.php";
+// Load configuration (OVH: www/conf, Docker: /var/www/html/conf)
+$ovh_path    = dirname(__DIR__, 2) . "/www/conf/conf.php";
 $docker_path = "/var/www/html/conf/conf.php";
 
 if (file_exists($ovh_path)) {
     require $ovh_path;
-    $log_path = dirname(__DIR__) . "/../tmp";
+    $log_path = dirname(__DIR__, 2) . "/tmp";
 } elseif (file_exists($docker_path)) {
     require $docker_path;
     $log_path = "/tmp";
 } else {
-    die("Configuration file not found");
+    exit;
 }
+// blank page is displayed if file not found
 
 // Set global log path
 if (!defined('LOG_PATH')) {
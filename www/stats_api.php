@@ -22,6 +22,16 @@ header('Content-Type: application/json');
 $action = $_GET['action'] ?? '';
 $season = $_SESSION['season'] ?? get_current_season();
 
+// the evolution data only changes with the results of the season and the pseudos,
+// and depends on the session player and team
+\Top7\Display\PageRenderer::conditional(["season_$season", "pseudo", "players"], [
+    $season,
+    $_SESSION['player_idx'] ?? $_SESSION['player'] ?? null,
+    $_SESSION['team'] ?? $_SESSION['top7team'] ?? null,
+    $_SESSION['pseudo'] ?? null,
+    $_GET,
+]);
+
 try {
     switch ($action) {
         case 'player_evolution':
@@ -30,7 +40,12 @@ try {
 
         case 'player_comparison':
             $players = $_GET['players'] ?? '';
-            $player_ids = array_filter(array_map('intval', explode(',', $players)));
+            $player_ids = array_values(array_unique(array_filter(array_map('intval', explode(',', $players)))));
+            if (count($player_ids) > c_stats_max_players) {
+                http_response_code(400);
+                echo json_encode(['error' => 'Trop de joueurs sélectionnés (max ' . c_stats_max_players . ')']);
+                break;
+            }
             echo json_encode(get_players_comparison_data($season, $player_ids));
             break;
 
@@ -56,7 +71,7 @@ try {
  * Récupère l'évolution du joueur connecté par journée
  */
 function get_player_evolution_data($season) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::getRead();
 
     $player_id = $_SESSION['player_idx'] ?? $_SESSION['player'] ?? null;
     $team = $_SESSION['team'] ?? $_SESSION['top7team'] ?? null;
@@ -81,97 +96,28 @@ function get_player_evolution_data($season) {
         'player_name' => $_SESSION['pseudo']
     ];
 
-    // Pour chaque journée, calculer les points cumulés et le classement
+    // Historique du joueur : une ligne par journée
+    $history = [];
+    foreach (get_stats_history($season, $max_day, [intval($player_id)]) as $row) {
+        if ($row['player'] == $player_id) {
+            $history[$row['day']] = $row;
+        }
+    }
+
     for ($day = 1; $day <= $max_day; $day++) {
         $evolution['labels'][] = "J" . $day;
-
-        // Récupérer les points à cette journée en utilisant l'historique des pronostics
-        $points = get_player_points_at_day($player_id, $season, $day);
-        $evolution['points'][] = $points;
-
-        // Récupérer le classement à cette journée
-        $rank = get_player_rank_at_day($player_id, $season, $day, $team);
-        $evolution['rank'][] = $rank;
+        $evolution['points'][] = intval($history[$day]['pt'] ?? 0);
+        $evolution['rank'][] = isset($history[$day]) ? intval($history[$day]['rank']) : null;
     }
 
     return $evolution;
 }
 
-/**
- * Calcule les points d'un joueur jusqu'à une journée donnée
- */
-function get_player_points_at_day($player_id, $season, $day) {
-    global $pdo;
-
-    // Compter les bons pronostics jusqu'à cette journée
-    $sql = "SELECT COUNT(*) as correct_pronos
-            FROM prono p
-            INNER JOIN `match` m ON p.match = m.id
-            INNER JOIN score s ON s.season = m.season AND s.day = m.day
-            WHERE p.player = :player_id
-            AND p.season = :season
-            AND m.day <= :day
-            AND s.team = p.team
-            AND s.V = 1";
-
-    $stmt = $pdo->prepare($sql);
-    $stmt->execute([
-        ':player_id' => $player_id,
-        ':season' => $season,
-        ':day' => $day
-    ]);
-
-    $result = $stmt->fetch(PDO::FETCH_ASSOC);
-
-    // Points = nombre de bons pronostics × 3 (ou selon votre système de points)
-    // Note: ajuster selon le vrai système de calcul de points
-    return intval($result['correct_pronos'] ?? 0) * 3;
-}
-
-/**
- * Récupère le classement d'un joueur à une journée donnée
- */
-function get_player_rank_at_day($player_id, $season, $day, $team) {
-    global $pdo;
-
-    // Calculer le classement basé sur les points à cette journée
-    $sql = "SELECT player_idx,
-                   (SELECT COUNT(*)
-                    FROM prono p2
-                    INNER JOIN `match` m2 ON p2.match = m2.id
-                    INNER JOIN score s2 ON s2.season = m2.season AND s2.day = m2.day AND s2.team = p2.team
-                    WHERE p2.player = player.player_idx
-                    AND p2.season = :season1
-                    AND m2.day <= :day
-                    AND s2.V = 1) as points
-            FROM player
-            WHERE season = :season2 AND team = :team AND status = 1
-            ORDER BY points DESC";
-
-    $stmt = $pdo->prepare($sql);
-    $stmt->execute([
-        ':season1' => $season,
-        ':season2' => $season,
-        ':day' => $day,
-        ':team' => $team
-    ]);
-
-    $rank = 1;
-    while ($row = $stmt->fetch(PDO::FETCH_ASSOC)) {
-        if ($row['player_idx'] == $player_id) {
-            return $rank;
-        }
-        $rank++;
-    }
-
-    return null;
-}
-
 /**
  * Récupère les données de comparaison de plusieurs joueurs
  */
 function get_players_comparison_data($season, $player_ids) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::getRead();
 
     if (empty($player_ids)) {
         return ['error' => 'Aucun joueur sélectionné'];
@@ -189,23 +135,32 @@ function get_players_comparison_data($season, $player_ids) {
         $comparison['labels'][] = "J" . $day;
     }
 
+    // Infos des joueurs
+    $ids = implode(',', array_map('intval', $player_ids));
+    $stmt = $pdo->prepare("SELECT player_idx, pseudo, team FROM player WHERE player_idx IN ($ids) AND season = :season");
+    $stmt->execute([':season' => $season]);
+    $players = [];
+    while ($row = $stmt->fetch(PDO::FETCH_ASSOC)) {
+        $players[$row['player_idx']] = $row;
+    }
+
+    // Historique de tous les joueurs en une requête
+    $history = [];
+    foreach (get_stats_history($season, $max_day, array_keys($players) ?: [0]) as $row) {
+        $history[$row['player']][$row['day']] = intval($row['pt']);
+    }
+
     // Pour chaque joueur
     foreach ($player_ids as $player_id) {
-        // Récupérer les infos du joueur
-        $stmt = $pdo->prepare("SELECT pseudo, team FROM player WHERE player_idx = :player_id AND season = :season");
-        $stmt->execute([':player_id' => $player_id, ':season' => $season]);
-        $player = $stmt->fetch(PDO::FETCH_ASSOC);
-
-        if (!$player) continue;
+        if (!isset($players[$player_id])) continue;
 
         $data = [];
         for ($day = 1; $day <= $max_day; $day++) {
-            $points = get_player_points_at_day($player_id, $season, $day);
-            $data[] = $points;
+            $data[] = $history[$player_id][$day] ?? 0;
         }
 
         $comparison['datasets'][] = [
-            'label' => $player['pseudo'],
+            'label' => $players[$player_id]['pseudo'],
             'data' => $data,
             'player_id' => $player_id
         ];
@@ -218,7 +173,7 @@ function get_players_comparison_data($season, $player_ids) {
  * Récupère l'évolution d'une équipe Top7
  */
 function get_team_evolution_data($season, $team) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::getRead();
 
     $max_day = get_last_day($season);
 
@@ -227,44 +182,112 @@ function get_team_evolution_data($season, $team) {
         'points' => []
     ];
 
+    // Somme des points de tous les joueurs de l'équipe, par journée
+    $team_points = [];
+    foreach (get_stats_history($season, $max_day, [], $team) as $row) {
+        if ($row['status'] == 1) {
+            $team_points[$row['day']] = ($team_points[$row['day']] ?? 0) + intval($row['pt']);
+        }
+    }
+
     for ($day = 1; $day <= $max_day; $day++) {
         $evolution['labels'][] = "J" . $day;
-
-        // Somme des points de tous les joueurs de l'équipe
-        $sql = "SELECT SUM(points) as team_points
-                FROM (
-                    SELECT player_idx,
-                           (SELECT COUNT(*)
-                            FROM prono p2
-                            INNER JOIN `match` m2 ON p2.match = m2.id
-                            INNER JOIN score s2 ON s2.season = m2.season AND s2.day = m2.day AND s2.team = p2.team
-                            WHERE p2.player = player.player_idx
-                            AND p2.season = :season
-                            AND m2.day <= :day
-                            AND s2.V = 1) * 3 as points
-                    FROM player
-                    WHERE season = :season AND team = :team AND status = 1
-                ) as player_points";
-
-        $stmt = $pdo->prepare($sql);
-        $stmt->execute([
-            ':season' => $season,
-            ':day' => $day,
-            ':team' => $team
-        ]);
-
-        $result = $stmt->fetch(PDO::FETCH_ASSOC);
-        $evolution['points'][] = intval($result['team_points'] ?? 0);
+        $evolution['points'][] = $team_points[$day] ?? 0;
     }
 
     return $evolution;
 }
 
+/**
+ * Historique cumulé (points et classement dans l'équipe Top7) par joueur et par journée,
+ * pour les joueurs donnés ou pour une équipe Top7 ($team).
+ * Lu dans les snapshots player_day, ou calculé en une seule requête (fonctions de fenêtrage
+ * sur prono/score) si la saison n'a pas de snapshots.
+ */
+function get_stats_history($season, $max_day, $player_ids, $team = 0) {
+    // ni équipe ni joueur (team absent ou 0) : pas d'historique
+    if (!$team && empty($player_ids)) {
+        return [];
+    }
+
+    $pdo = \Top7\Database\Connection::getRead();
+
+    $params = [':season' => $season, ':max_day' => $max_day];
+    if ($team) {
+        $where = "pl.team = :team";
+        $params[':team'] = $team;
+    } else {
+        $ids   = implode(',', array_map('intval', $player_ids));
+        $where = "pl.player_idx IN ($ids)";
+    }
+
+    $sql = "SELECT pd.player, pd.day, pd.pt, pd.`rank`, pl.status
+            FROM player_day pd
+            INNER JOIN player pl ON pl.player_idx = pd.player
+            WHERE pd.season = :season AND pd.day <= :max_day AND $where
+            ORDER BY pd.player, pd.day";
+    $stmt = $pdo->prepare($sql);
+    $stmt->execute($params);
+    $rows = $stmt->fetchAll(PDO::FETCH_ASSOC);
+    if (count($rows)) {
+        return $rows;
+    }
+
+    // Pas de snapshots : cumuls par journée (SUM OVER) puis classement par équipe et journée
+    // (ROW_NUMBER OVER, mêmes départages que get_rank7_query()) sur tous les joueurs des équipes concernées
+    if (!$team) {
+        $where = "pl.team IN (SELECT p2.team FROM player p2 WHERE p2.player_idx IN ($ids))";
+    }
+    $params[':season2'] = $season;
+    // ne : une équipe compte à sa première journée jouée (J=1) ; sans prono ne=0, sans prono joué ne=NULL
+    $ne = "CASE WHEN c.nb_prono = 0 THEN 0 WHEN c.ne = 0 THEN NULL ELSE c.ne END";
+    $sql = "SELECT c.player, c.day, c.pt, c.status,
+                   ROW_NUMBER() OVER (PARTITION BY c.team, c.day
+                       ORDER BY c.pt DESC, c.g DESC, c.ve DESC, $ne DESC, c.n DESC, c.diff DESC, c.date_reg ASC) AS `rank`
+            FROM (
+                SELECT f.player, f.team, f.status, f.date_reg, f.day,
+                       SUM(f.day_pt) OVER w AS pt,
+                       SUM(f.day_g) OVER w AS g,
+                       SUM(f.day_ve) OVER w AS ve,
+                       SUM(f.day_n) OVER w AS n,
+                       SUM(f.day_diff) OVER w AS diff,
+                       SUM(f.day_prono) OVER w AS nb_prono,
+                       SUM(f.first_team) OVER w AS ne
+                FROM (
+                    SELECT g.*,
+                           CASE WHEN g.played_team IS NULL THEN 0
+                                WHEN ROW_NUMBER() OVER (PARTITION BY g.player, g.played_team ORDER BY g.day) = 1 THEN 1
+                                ELSE 0 END AS first_team
+                    FROM (
+                        SELECT pl.player_idx AS player, pl.team, pl.status, pl.date_reg, d.day,
+                               COALESCE(SUM(s.pc), 0) AS day_pt,
+                               COALESCE(SUM(s.V), 0) AS day_g,
+                               COALESCE(SUM(s.ve), 0) AS day_ve,
+                               COALESCE(SUM(s.N), 0) AS day_n,
+                               COALESCE(SUM(s.pm), 0) - COALESCE(SUM(s.pe), 0) AS day_diff,
+                               COUNT(pr.id) AS day_prono,
+                               MAX(CASE WHEN s.J = 1 AND pr.team > 0 THEN pr.team END) AS played_team
+                        FROM player pl
+                        INNER JOIN (SELECT DISTINCT day FROM `match` WHERE season = :season AND day <= :max_day) d
+                        LEFT JOIN prono pr ON pr.player = pl.player_idx AND pr.season = pl.season AND pr.day = d.day
+                        LEFT JOIN score s ON s.season = pr.season AND s.day = pr.day AND s.team = pr.team
+                        WHERE pl.season = :season2 AND $where
+                        GROUP BY pl.player_idx, pl.team, pl.status, pl.date_reg, d.day
+                    ) g
+                ) f
+                WINDOW w AS (PARTITION BY f.player ORDER BY f.day)
+            ) c
+            ORDER BY c.player, c.day";
+    $stmt = $pdo->prepare($sql);
+    $stmt->execute($params);
+    return $stmt->fetchAll(PDO::FETCH_ASSOC);
+}
+
 /**
  * Récupère la liste des joueurs d'une équipe
  */
 function get_players_list($season) {
-    global $pdo;
+    $pdo = \Top7\Database\Connection::getRead();
 
     $team = $_SESSION['team'] ?? $_SESSION['top7team'] ?? null;
 
@@ -4,6 +4,7 @@
 // update point fun for season 0,1,2
 //
     include("common.inc");
+    load_module("update");
     init_sql();
 
 
@@ -2,6 +2,7 @@
 
 
 	include("common.inc");
+	load_module("forum", "email");
 	check_session();
 
 	init_admin_sql();
@@ -0,0 +1,20 @@
+<?php
+
+
+	include("common.inc");
+	load_module("update");
+	check_session();
+
+	if( $_SERVER['REQUEST_METHOD'] == 'POST') {
+
+		if( isset( $_POST['button'])) {
+			if( $_POST['button'] == "Entrer" ) {
+				init_admin_sql();
+				update_match_day( $_POST);
+			}
+		}
+	}
+
+	header( 'location: update_day');
+
+?>
@@ -2,6 +2,7 @@
 
 
 	include("common.inc");
+	load_module("update");
 	check_session();
 
 	#echo "<pre>"; print_r($_GET); echo "</pre>";
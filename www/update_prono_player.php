@@ -2,6 +2,7 @@
 
 
 	include("common.inc");
+	load_module("update", "email");
 	check_session();
 
 #printr($_GET); 